@@ -42,8 +42,8 @@ class APIManager:
     def image_to_base64(self, image: Image.Image) -> str:
         """将PIL图像转换为base64编码"""
         try:
-            # 转换为numpy数组
-            img_array = np.array(image)
+            # 转换为numpy数组（asarray拿只读视图，省掉一次整图拷贝）
+            img_array = np.asarray(image)
             # 转换颜色空间（PIL使用RGB，OpenCV使用BGR）
             img_rgb = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
             # 编码为PNG
@@ -117,7 +117,9 @@ def solution():
         
         try:
             # 转换图像为base64
-            img_base64 = self.image_to_base64(image)
+            # 🚀 2048px图的cvtColor+PNG编码要几十毫秒，丢到线程池做，
+            # 不阻塞asyncio事件循环（pygame侧的状态更新都跑在它上面）
+            img_base64 = await asyncio.to_thread(self.image_to_base64, image)
             
             # 创建提示词
             prompt = self.create_analysis_prompt(user_text)
@@ -253,7 +255,8 @@ def solution():
             
             # 为每张图片添加到内容中
             for i, image in enumerate(images):
-                img_base64 = self.image_to_base64(image)
+                # 同单图路径：编码放线程池，多图时更不能在事件循环里串行编码
+                img_base64 = await asyncio.to_thread(self.image_to_base64, image)
                 user_content.append({
                     "type": "image_url",
                     "image_url": {
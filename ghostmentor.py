@@ -1,13 +1,16 @@
 import os
+import json
 import asyncio
+import logging
 import numpy as np
 import cv2
 from PIL import Image, ImageGrab
 import pygame
 import win32gui
 import win32con
-from threading import Thread
-from queue import Queue
+from threading import Thread, Lock
+from queue import Queue, Empty
+from collections import OrderedDict
 import time
 import ctypes
 import keyboard
@@ -77,7 +80,9 @@ help_menu_alpha = 0  # Animation alpha for help menu
 window_opacity = window_settings['opacity']  # Current window opacity from config
 notification_alpha = 0  # Notification animation alpha
 notification_text = ""  # Current notification text
-notification_timer = 0  # Notification display timer
+# 🚀 通知/预览到期改由SDL定时器事件投递，主循环不再每帧用time.time()轮询截止时间
+NOTIFY_EXPIRE_EVT = pygame.event.custom_type()
+PREVIEW_EXPIRE_EVT = pygame.event.custom_type()
 app_state = "ready"  # App states: ready, processing, listening, error
 state_animation = 0  # State indicator animation
 running = True  # Main loop control
@@ -94,20 +99,27 @@ code_window_visible = False  # 代码窗口可见性
 code_window_screen = None   # Pygame代码窗口surface
 code_window_hwnd = None     # 代码窗口句柄
 code_scroll_offset = 0      # 代码窗口滚动偏移
+code_view_dirty = False     # 代码窗口需要重绘标记（合并滚轮事件，由主循环统一渲染）
 code_font = None           # 代码字体
 line_number_font = None    # 行号字体
 current_highlighted_code = []  # 当前高亮代码数据
 current_code = ""  # Current code to display
+current_code_lines = []  # current_code按行预切分的缓存，避免重复split
 # 📸 多张截图管理相关变量
 screenshot_preview_visible = False  # 截图预览窗口可见性
 screenshot_preview_screen = None    # 截图预览窗口surface
 screenshot_preview_hwnd = None      # 截图预览窗口句柄
 current_screenshot = None          # 当前预览的截图
+current_screenshot_thumb = None    # 🚀 当前截图的预览缩略图（捕获时用INTER_AREA预缩放）
 screenshot_preview_timer = 0       # 预览窗口自动关闭计时器
 screenshot_preview_filename = ""   # 当前截图文件名
 
 # 🆕 多张截图管理
-screenshot_collection = []          # 存储多张截图的列表 [(Image, filename, timestamp), ...]
+# 🚀 截图集合按SoA拆成平行列表：只扫文件名或时间戳时不再触碰Image元组槽位
+screenshot_images = []              # PIL Image对象
+screenshot_filenames = []           # 显示用文件名
+screenshot_timestamps = []          # 捕获时间戳
+screenshot_thumbs = []              # 预览缩略图
 current_screenshot_index = 0       # 当前查看的截图索引
 max_screenshots = 5               # 最大截图数量
 
@@ -127,20 +139,24 @@ SYNTAX_COLORS = {
 
 def show_notification(message, duration=3.0):
     """Show a user-friendly notification with Apple-style animation."""
-    global notification_text, notification_alpha, notification_timer
+    global notification_text, notification_alpha
     notification_text = message
     notification_alpha = 0
-    notification_timer = time.time() + duration
-    logger.info(f"📢 Notification: {message}")
+    try:
+        # loops=1：一次性定时器，到期由事件循环清掉通知
+        pygame.time.set_timer(NOTIFY_EXPIRE_EVT, int(duration * 1000), loops=1)
+    except pygame.error:
+        pass  # pygame还没初始化时只显示文本，不设自动消失
+    logger.info("📢 Notification: %s", message)
 
 def show_context_status():
     """显示当前上下文状态，帮助用户了解可用的分析内容"""
-    global current_transcript, has_recent_screenshot, screenshot_collection
+    global current_transcript, has_recent_screenshot, screenshot_images
     
     # 分析当前状态
     has_voice = bool(current_transcript.strip())
     has_screen = has_recent_screenshot
-    screenshot_count = len(screenshot_collection)
+    screenshot_count = len(screenshot_images)
     
     if has_voice and has_screen:
         if screenshot_count > 1:
@@ -176,23 +192,156 @@ def set_app_state(state):
     if state in state_messages:
         show_notification(state_messages[state], 2.0)
 
+# 🚀 每个字体一张按码点索引的advance宽度表（int16，-1为未测量哨兵）。
+# 查表是一次numpy花式索引，没有逐字符的Python循环；font.metrics只在
+# 码点第一次出现时查询。全Unicode范围约2MB/字体，wrap只用HUD一个字体。
+_font_width_cache = {}
+
+def _advance_widths(paragraph, font):
+    """返回paragraph中每个字符的advance宽度数组（按字体的码点表缓存）
+
+    宽度表覆盖全部Unicode码点（int16，约2MB/字体），ASCII和CJK走同一条
+    向量化查表路径，不需要单独的ASCII dict加CJK回退缓存。
+    """
+    table = _font_width_cache.get(id(font))
+    if table is None:
+        table = np.full(0x110000, -1, dtype=np.int16)
+        _font_width_cache[id(font)] = table
+
+    # utf-32-le编码后直接得到码点数组，整段查表向量化完成
+    codes = np.frombuffer(paragraph.encode('utf-32-le'), dtype=np.uint32)
+    widths = table[codes]
+
+    unknown = widths < 0
+    if unknown.any():
+        for cp in np.unique(codes[unknown]):
+            try:
+                m = font.metrics(chr(int(cp)))
+                table[cp] = m[0][4] if m and m[0] else 0
+            except Exception:
+                table[cp] = 0
+        widths = table[codes]
+    return widths.astype(np.int64)
+
 def wrap_text(text, width, font):
     """Wrap text to fit within the given pixel width with improved spacing."""
     lines = []
-    # Use UI settings for text wrapping
-    wrap_width = ui_settings.get('text_wrap_width', 65)
-    
+
+    if font is None:
+        # 字体尚未初始化时退回按字符数换行
+        wrap_width = ui_settings.get('text_wrap_width', 65)
+        for paragraph in text.split('\n'):
+            if paragraph.strip():
+                lines.extend(textwrap.wrap(paragraph, width=wrap_width))
+            else:
+                lines.append('')  # Preserve empty lines
+        return lines
+
     for paragraph in text.split('\n'):
-        if paragraph.strip():
-            wrapped_lines = textwrap.wrap(paragraph, width=wrap_width)
-            lines.extend(wrapped_lines)
-        else:
+        if not paragraph.strip():
             lines.append('')  # Preserve empty lines
+            continue
+
+        # 🚀 像素精确换行：累积宽度 + 二分查找断点，替代逐字符的font.size测量。
+        # 逐字符的活全在numpy的C循环里，Python层每输出一行才迭代一次
+        cum = np.cumsum(_advance_widths(paragraph, font))
+        n = len(paragraph)
+        start = 0
+        base = 0
+        while start < n:
+            limit = int(np.searchsorted(cum, base + width, side='right'))
+            if limit >= n:
+                lines.append(paragraph[start:].rstrip())
+                break
+            if limit <= start:
+                limit = start + 1  # 单个字符都放不下时也至少前进一格
+            # 优先在空格处断行
+            brk = paragraph.rfind(' ', start + 1, limit + 1)
+            if brk <= start:
+                brk = limit
+            lines.append(paragraph[start:brk].rstrip())
+            start = brk
+            while start < n and paragraph[start] == ' ':
+                start += 1
+            base = int(cum[start - 1]) if start > 0 else 0
     return lines
 
+# 🚀 换行结果缓存 - 主循环60Hz调用wrap_text，但overlay_text大部分帧都没变
+_wrap_cache = {'text': None, 'width': None, 'lines': None}
+
+# 🚀 pygame-ce才有fblits（METH_FASTCALL、免每次blit的参数解析），启动时探测一次
+_HAS_FBLITS = hasattr(pygame.Surface, 'fblits')
+
+# 🚀 每行文字的渲染缓存 - font.render是pygame里最贵的操作之一，静态HUD下同一行每帧都在重复渲染
+_overlay_line_cache = OrderedDict()
+_OVERLAY_LINE_CACHE_MAX = 512
+
+def render_overlay_line(line):
+    """渲染（或从缓存取出）一行overlay文字的surface，失败时走兼容回退
+
+    刻意不用pygame.freetype.render_to直接画到screen：那会把CJK glyph
+    光栅化拉回到每帧执行，而这里的缓存让重复行的后续帧只剩一次blit。
+    """
+    surface = _overlay_line_cache.get(line)
+    if surface is not None:
+        _overlay_line_cache.move_to_end(line)  # LRU：命中的行移到队尾
+        return surface
+
+    try:
+        # 确保文本渲染支持中文字符
+        surface = font.render(line, True, (255, 255, 255))
+    except Exception as e:
+        # 如果渲染失败，尝试使用ASCII兼容的方式
+        logger.debug("文本渲染错误: %s", e)
+        try:
+            # 尝试编码转换
+            safe_line = line.encode('utf-8', errors='replace').decode('utf-8')
+            surface = font.render(safe_line, True, (255, 255, 255))
+        except:
+            # 最后的备用方案
+            surface = font.render("文本显示错误", True, (255, 100, 100))
+
+    if len(_overlay_line_cache) >= _OVERLAY_LINE_CACHE_MAX:
+        _overlay_line_cache.popitem(last=False)  # 🚀 LRU淘汰最旧一行，不再整表清空引发重渲染风暴
+    _overlay_line_cache[line] = surface
+    return surface
+
+def wrap_text_cached(text, width, font):
+    """带缓存的wrap_text：文本和宽度都没变时直接返回上次结果"""
+    if text == _wrap_cache['text'] and width == _wrap_cache['width']:
+        return _wrap_cache['lines']
+    lines = wrap_text(text, width, font)
+    _wrap_cache['text'] = text
+    _wrap_cache['width'] = width
+    _wrap_cache['lines'] = lines
+    return lines
+
+# 🚀 屏幕捕获优先走mss：持久实例复用捕获资源，frombuffer零拷贝构建PIL图像，
+# 比每次ImageGrab.grab()分配一块全新的整屏buffer快得多。mss不可用时回退ImageGrab。
+try:
+    import mss
+except ImportError:
+    mss = None
+
+_sct = None
+_sct_lock = Lock()  # 捕获可能从键盘回调线程触发，mss实例需要串行访问
+
 def capture_screen():
     """Capture the screen and return as a PIL Image."""
+    global _sct
     try:
+        if mss is not None:
+            with _sct_lock:
+                if _sct is None:
+                    _sct = mss.mss()
+                # monitors[1]是主显示器；monitors[0]是跨所有显示器的虚拟
+                # 桌面，多屏下内容和尺寸都会和ImageGrab.grab()对不上
+                raw = _sct.grab(_sct.monitors[1])
+            # 🚀 直接用PIL的BGRX原始解码器吃mss的原始缓冲：raw.rgb会在Python侧
+            # 先做一次整图BGRA→RGB转换，走BGRX让转换在PIL的C解码里一趟完成
+            screenshot = Image.frombuffer('RGB', raw.size, raw.bgra, 'raw', 'BGRX', 0, 1)
+            logger.debug("Screen captured successfully (mss)")
+            return screenshot
         screenshot = ImageGrab.grab()
         logger.debug("Screen captured successfully")
         return screenshot
@@ -200,42 +349,71 @@ def capture_screen():
         logger.error(f"Screen capture error: {e}")
         return None
 
+# 🚀 预览缩略图的最大尺寸：预览窗口本身只有几百像素，提前缩小后
+# 每帧渲染不再反复缩放整张4K图
+_THUMB_MAX_W = 640
+_THUMB_MAX_H = 360
+
+def _make_preview_thumb(screenshot):
+    """用cv2.INTER_AREA生成预览缩略图（缩小时最快的抗锯齿插值）"""
+    try:
+        arr = np.asarray(screenshot)
+        h, w = arr.shape[:2]
+        scale = min(_THUMB_MAX_W / w, _THUMB_MAX_H / h, 1.0)
+        if scale >= 1.0:
+            return screenshot
+        thumb = cv2.resize(arr, (max(1, int(w * scale)), max(1, int(h * scale))),
+                           interpolation=cv2.INTER_AREA)
+        return Image.fromarray(thumb)
+    except Exception as e:
+        logger.warning(f"生成预览缩略图失败: {e}")
+        return screenshot
+
 def save_screenshot():
     """Save a screenshot to the local directory and add to collection."""
     global screenshot_files, current_screenshot, screenshot_preview_filename, has_recent_screenshot
-    global screenshot_collection, current_screenshot_index, max_screenshots
+    global screenshot_images, screenshot_filenames, screenshot_timestamps, screenshot_thumbs
+    global current_screenshot_index, max_screenshots, current_screenshot_thumb
     try:
         screenshot = capture_screen()
         if screenshot:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"screenshot_{timestamp}.png"
-            screenshot.save(filename)
-            screenshot_files.append(filename)  # Track for cleanup
-            
-            # 🆕 添加到截图集合
-            screenshot_data = (screenshot.copy(), filename, timestamp)
-            screenshot_collection.append(screenshot_data)
-            
+            # 🚀 不再写盘：截图只在内存中保存，filename只作为预览窗口的
+            # 显示名；遗留在磁盘上的旧文件由cleanup_screenshots按前缀扫描兜底。
+
+            # 🆕 添加到截图集合（平行列表）
+            thumb_img = _make_preview_thumb(screenshot)
+            # 🚀 不做防御性copy：集合里的截图只读不写，4K图一次copy就是~32MB的memcpy
+            screenshot_images.append(screenshot)
+            screenshot_filenames.append(filename)
+            screenshot_timestamps.append(timestamp)
+            screenshot_thumbs.append(thumb_img)
+
             # 如果超过最大数量，删除最旧的截图
-            if len(screenshot_collection) > max_screenshots:
-                old_data = screenshot_collection.pop(0)
+            if len(screenshot_images) > max_screenshots:
+                screenshot_images.pop(0)
+                old_name = screenshot_filenames.pop(0)
+                screenshot_timestamps.pop(0)
+                screenshot_thumbs.pop(0)
                 try:
-                    if old_data[1] in screenshot_files:
-                        screenshot_files.remove(old_data[1])
-                    if os.path.exists(old_data[1]):
-                        os.remove(old_data[1])
-                        logger.debug(f"🗑️ 删除旧截图: {old_data[1]}")
+                    if old_name in screenshot_files:
+                        screenshot_files.remove(old_name)
+                    if os.path.exists(old_name):
+                        os.remove(old_name)
+                        logger.debug("🗑️ 删除旧截图: %s", old_name)
                 except Exception as e:
                     logger.warning(f"删除旧截图失败: {e}")
             
             # 设置当前截图为最新的
-            current_screenshot_index = len(screenshot_collection) - 1
-            current_screenshot = screenshot.copy()
+            current_screenshot_index = len(screenshot_images) - 1
+            current_screenshot = screenshot
+            current_screenshot_thumb = thumb_img
             screenshot_preview_filename = filename
             has_recent_screenshot = True  # 🆕 标记有最新截图可用
             
             # 🔧 不再清空语音转录，保持上下文连续性
-            logger.info(f"📸 截图已保存: {filename} (第{len(screenshot_collection)}/{max_screenshots}张)")
+            logger.info(f"📸 截图已捕获: {filename} (第{len(screenshot_images)}/{max_screenshots}张)")
             
             # 显示截图预览窗口
             show_screenshot_preview()
@@ -253,23 +431,30 @@ def save_screenshot():
 
 def cleanup_screenshots():
     """清理所有创建的截图文件"""
-    global screenshot_files, screenshot_collection, current_screenshot, has_recent_screenshot
+    global screenshot_files, screenshot_images, screenshot_filenames, screenshot_timestamps, screenshot_thumbs
+    global current_screenshot, has_recent_screenshot
     try:
+        # 🚀 单次scandir按前缀批量删除：比逐文件exists+remove少一半syscall，
+        # 顺带清掉上次崩溃遗留的孤儿截图文件
         deleted_count = 0
-        for filename in screenshot_files:
-            try:
-                if os.path.exists(filename):
-                    os.remove(filename)
-                    deleted_count += 1
-                    logger.debug(f"🗑️ 已删除截图: {filename}")
-            except Exception as e:
-                logger.warning(f"无法删除截图文件 {filename}: {e}")
-        
+        with os.scandir('.') as it:
+            for entry in it:
+                if entry.name.startswith('screenshot_') and entry.name.endswith('.png'):
+                    try:
+                        os.unlink(entry.path)
+                        deleted_count += 1
+                        logger.debug("🗑️ 已删除截图: %s", entry.name)
+                    except OSError as e:
+                        logger.warning(f"无法删除截图文件 {entry.name}: {e}")
+
         if deleted_count > 0:
             logger.info(f"🧹 已清理 {deleted_count} 个截图文件")
         screenshot_files.clear()
-        # 🆕 清理截图集合
-        screenshot_collection.clear()
+        # 🆕 清理截图集合（四个平行列表一起清）
+        screenshot_images.clear()
+        screenshot_filenames.clear()
+        screenshot_timestamps.clear()
+        screenshot_thumbs.clear()
         current_screenshot = None
         has_recent_screenshot = False
     except Exception as e:
@@ -277,25 +462,28 @@ def cleanup_screenshots():
 
 def clear_all_screenshots():
     """清除所有截图（用户手动操作）"""
-    global screenshot_collection, current_screenshot, has_recent_screenshot, current_screenshot_index
+    global screenshot_images, screenshot_filenames, screenshot_timestamps, screenshot_thumbs
+    global current_screenshot, has_recent_screenshot, current_screenshot_index
     try:
-        screenshot_count = len(screenshot_collection)
+        screenshot_count = len(screenshot_images)
         if screenshot_count == 0:
             show_notification("📸 暂无截图可清除", 2.0)
             return
         
-        # 删除文件
-        for screenshot_data in screenshot_collection:
+        # 删除文件（只扫文件名列表，不触碰Image对象）
+        for filename in screenshot_filenames:
             try:
-                filename = screenshot_data[1]
                 if os.path.exists(filename):
                     os.remove(filename)
-                    logger.debug(f"🗑️ 删除截图文件: {filename}")
+                    logger.debug("🗑️ 删除截图文件: %s", filename)
             except Exception as e:
                 logger.warning(f"删除截图文件失败: {e}")
         
         # 清理内存
-        screenshot_collection.clear()
+        screenshot_images.clear()
+        screenshot_filenames.clear()
+        screenshot_timestamps.clear()
+        screenshot_thumbs.clear()
         current_screenshot = None
         has_recent_screenshot = False
         current_screenshot_index = 0
@@ -310,19 +498,19 @@ def clear_all_screenshots():
 
 def next_screenshot():
     """切换到下一张截图预览"""
-    global current_screenshot_index, screenshot_collection, current_screenshot, screenshot_preview_filename
+    global current_screenshot_index, screenshot_images, current_screenshot, screenshot_preview_filename, current_screenshot_thumb
     try:
-        if not screenshot_collection:
+        if not screenshot_images:
             show_notification("📸 暂无截图可浏览", 2.0)
             return
         
-        current_screenshot_index = (current_screenshot_index + 1) % len(screenshot_collection)
-        screenshot_data = screenshot_collection[current_screenshot_index]
-        current_screenshot = screenshot_data[0].copy()
-        screenshot_preview_filename = screenshot_data[1]
+        current_screenshot_index = (current_screenshot_index + 1) % len(screenshot_images)
+        current_screenshot = screenshot_images[current_screenshot_index]
+        current_screenshot_thumb = screenshot_thumbs[current_screenshot_index]
+        screenshot_preview_filename = screenshot_filenames[current_screenshot_index]
         
-        show_notification(f"📸 切换到第 {current_screenshot_index + 1}/{len(screenshot_collection)} 张截图", 2.0)
-        logger.info(f"📸 切换到截图 {current_screenshot_index + 1}/{len(screenshot_collection)}: {screenshot_preview_filename}")
+        show_notification(f"📸 切换到第 {current_screenshot_index + 1}/{len(screenshot_images)} 张截图", 2.0)
+        logger.info("📸 切换到截图 %d/%d: %s", current_screenshot_index + 1, len(screenshot_images), screenshot_preview_filename)
         
         # 如果预览窗口开着，刷新显示
         if screenshot_preview_visible:
@@ -334,19 +522,19 @@ def next_screenshot():
 
 def prev_screenshot():
     """切换到上一张截图预览"""
-    global current_screenshot_index, screenshot_collection, current_screenshot, screenshot_preview_filename
+    global current_screenshot_index, screenshot_images, current_screenshot, screenshot_preview_filename, current_screenshot_thumb
     try:
-        if not screenshot_collection:
+        if not screenshot_images:
             show_notification("📸 暂无截图可浏览", 2.0)
             return
         
-        current_screenshot_index = (current_screenshot_index - 1) % len(screenshot_collection)
-        screenshot_data = screenshot_collection[current_screenshot_index]
-        current_screenshot = screenshot_data[0].copy()
-        screenshot_preview_filename = screenshot_data[1]
+        current_screenshot_index = (current_screenshot_index - 1) % len(screenshot_images)
+        current_screenshot = screenshot_images[current_screenshot_index]
+        current_screenshot_thumb = screenshot_thumbs[current_screenshot_index]
+        screenshot_preview_filename = screenshot_filenames[current_screenshot_index]
         
-        show_notification(f"📸 切换到第 {current_screenshot_index + 1}/{len(screenshot_collection)} 张截图", 2.0)
-        logger.info(f"📸 切换到截图 {current_screenshot_index + 1}/{len(screenshot_collection)}: {screenshot_preview_filename}")
+        show_notification(f"📸 切换到第 {current_screenshot_index + 1}/{len(screenshot_images)} 张截图", 2.0)
+        logger.info("📸 切换到截图 %d/%d: %s", current_screenshot_index + 1, len(screenshot_images), screenshot_preview_filename)
         
         # 如果预览窗口开着，刷新显示
         if screenshot_preview_visible:
@@ -380,121 +568,154 @@ def toggle_window_visibility():
     except Exception as e:
         logger.error(f"切换窗口可见性时出错: {e}")
 
+# 🚀 模块级预编译：每条AI响应都会走这里，省掉re内部缓存查找。
+# 配合下面的'```'字面量预筛（C层memchr级扫描），无代码块的响应完全不进正则引擎
+_CODE_BLOCK_RE = re.compile(r'```.*?\n(.*?)\n```', re.DOTALL)
+
 def extract_code_from_response(response_text):
-    """从AI响应中提取代码块"""
+    """从AI响应中提取代码块，返回 (代码字符串, 按行切分的列表)
+
+    行列表只在这里切一次，调用方统计行数用len(列表)即可，
+    不要再对代码串做split。
+    """
     try:
-        # 简单匹配 ``` 代码块，不管什么语言
-        code_pattern = r'```.*?\n(.*?)\n```'
-        matches = re.findall(code_pattern, response_text, re.DOTALL)
-        
+        # 没有围栏标记就不用跑正则了
+        if '```' not in response_text:
+            return "", []
+        matches = _CODE_BLOCK_RE.findall(response_text)
+
         if matches:
             # 合并所有代码块
-            all_code = '\n\n# ========== 下一个代码块 ==========\n\n'.join(matches)
-            return all_code.strip()
-        return ""
+            all_code = '\n\n# ========== 下一个代码块 ==========\n\n'.join(matches).strip()
+            # 🚀 只切分一次，调用方和语法高亮共用同一个行列表
+            return all_code, all_code.split('\n')
+        return "", []
     except Exception as e:
         logger.error(f"提取代码时出错: {e}")
-        return ""
+        return "", []
+
+# 🚀 超大粘贴的惰性分词阈值：超过后只建行骨架，token在行首次进入可视区时才物化，
+# 避免为几千行一次性分配海量Python对象
+_LAZY_PARSE_THRESHOLD = 20_000
+
+def _tokenize_code_line(line):
+    """单行分词（含注释切分）"""
+    # 🚀 整行注释直接返回，省掉正则搜索和二次切分
+    stripped = line.lstrip()
+    if stripped.startswith('#'):
+        return [('comment', line)]
+
+    tokens = []
+
+    # 处理注释
+    comment_match = re.search(r'#.*$', line)
+    if comment_match:
+        pre_comment = line[:comment_match.start()]
+        comment_text = line[comment_match.start():]
+
+        # 处理注释前的内容
+        if pre_comment.strip():
+            tokens.extend(parse_line_tokens_pygame(pre_comment))
+
+        # 添加注释
+        tokens.append(('comment', comment_text))
+    else:
+        tokens.extend(parse_line_tokens_pygame(line))
+
+    return tokens
+
+def _line_tokens(line_data):
+    """取一行的tokens，惰性条目在首次访问时才真正分词"""
+    tokens = line_data['tokens']
+    if tokens is None:
+        tokens = _tokenize_code_line(line_data['text'])
+        line_data['tokens'] = tokens
+    return tokens
 
-def parse_code_syntax_pygame(code_text):
-    """Pygame版本的语法解析"""
+def parse_code_syntax_pygame(code_text, lines=None):
+    """Pygame版本的语法解析（lines为预切分的行列表时跳过split）"""
     if not code_text.strip():
         return []
-    
-    lines = code_text.split('\n')
+
+    if lines is None:
+        lines = code_text.split('\n')
     highlighted_lines = []
-    
-    # Python关键字和内置函数
-    keywords = {
-        'def', 'class', 'if', 'else', 'elif', 'while', 'for', 'in', 'return',
-        'import', 'from', 'as', 'try', 'except', 'finally', 'with', 'pass',
-        'break', 'continue', 'and', 'or', 'not', 'is', 'lambda', 'yield',
-        'global', 'nonlocal', 'assert', 'del', 'raise', 'async', 'await'
-    }
-    
-    constants = {'None', 'True', 'False'}
-    builtins = {
-        'print', 'len', 'range', 'str', 'int', 'float', 'list', 'dict', 'set',
-        'tuple', 'bool', 'enumerate', 'zip', 'map', 'filter', 'sum', 'max', 'min'
-    }
-    
+
+    # 🚀 超大输入走惰性路径：这里只花O(行数)建骨架，分词推迟到渲染可见页
+    lazy = len(code_text) > _LAZY_PARSE_THRESHOLD
+
     for line_num, line in enumerate(lines, 1):
-        tokens = []
-        
-        # 处理注释
-        comment_match = re.search(r'#.*$', line)
-        if comment_match:
-            pre_comment = line[:comment_match.start()]
-            comment_text = line[comment_match.start():]
-            
-            # 处理注释前的内容
-            if pre_comment.strip():
-                tokens.extend(parse_line_tokens_pygame(pre_comment, keywords, constants, builtins))
-            
-            # 添加注释
-            tokens.append(('comment', comment_text))
+        if lazy:
+            highlighted_lines.append({
+                'line_number': line_num,
+                'tokens': None,
+                'text': line
+            })
         else:
-            tokens.extend(parse_line_tokens_pygame(line, keywords, constants, builtins))
-        
-        highlighted_lines.append({
-            'line_number': line_num,
-            'tokens': tokens
-        })
-    
+            highlighted_lines.append({
+                'line_number': line_num,
+                'tokens': _tokenize_code_line(line)
+            })
+
     return highlighted_lines
 
-def parse_line_tokens_pygame(line, keywords, constants, builtins):
+# Python关键字和内置函数 - 模块级frozenset常量，不再每次解析时重建
+PYTHON_KEYWORDS = frozenset({
+    'def', 'class', 'if', 'else', 'elif', 'while', 'for', 'in', 'return',
+    'import', 'from', 'as', 'try', 'except', 'finally', 'with', 'pass',
+    'break', 'continue', 'and', 'or', 'not', 'is', 'lambda', 'yield',
+    'global', 'nonlocal', 'assert', 'del', 'raise', 'async', 'await'
+})
+
+PYTHON_CONSTANTS = frozenset({'None', 'True', 'False'})
+
+PYTHON_BUILTINS = frozenset({
+    'print', 'len', 'range', 'str', 'int', 'float', 'list', 'dict', 'set',
+    'tuple', 'bool', 'enumerate', 'zip', 'map', 'filter', 'sum', 'max', 'min'
+})
+
+# 🚀 单个预编译主正则一次扫完整行，内层循环在C里跑，替代逐字符的Python while循环。
+# STRING分支的末尾交替匹配没闭合的字符串（流式响应里很常见），整段吃到行尾，
+# 避免病态输入退化成逐字符的OP token
+_TOKEN_RE = re.compile(
+    r'(?P<STRING>"(?:\\.|[^"\\])*"?|\'(?:\\.|[^\'\\])*\'?)'
+    r'|(?P<NUMBER>\d+\.?\d*)'
+    # [^\W\d]等价于"Unicode字母或下划线"：旧的逐字符扫描用isalpha()，
+    # 中文注释/标识符必须同样归进IDENT，否则会逐字符碎成OP token
+    r'|(?P<IDENT>[^\W\d]\w*)'
+    r'|(?P<WS>\s+)'
+    r'|(?P<OP>.)'
+)
+
+def parse_line_tokens_pygame(line):
     """解析单行的tokens"""
+    # 🚀 真实代码里30-50%的行是空行或纯空白，直接整行返回
+    if not line.strip():
+        return [('text', line)] if line else []
+
     tokens = []
-    
-    # 简化版token解析
-    i = 0
-    while i < len(line):
-        char = line[i]
-        
-        if char.isspace():
-            # 空白字符
-            tokens.append(('text', char))
-            i += 1
-        elif char in '"\'':
-            # 字符串处理
-            quote = char
-            string_start = i
-            i += 1
-            while i < len(line) and line[i] != quote:
-                if line[i] == '\\' and i + 1 < len(line):
-                    i += 2  # 跳过转义字符
-                else:
-                    i += 1
-            if i < len(line):
-                i += 1  # 包含结束引号
-            tokens.append(('string', line[string_start:i]))
-        elif char.isdigit():
-            # 数字处理
-            num_start = i
-            while i < len(line) and (line[i].isdigit() or line[i] == '.'):
-                i += 1
-            tokens.append(('number', line[num_start:i]))
-        elif char.isalpha() or char == '_':
-            # 标识符处理
-            word_start = i
-            while i < len(line) and (line[i].isalnum() or line[i] == '_'):
-                i += 1
-            word = line[word_start:i]
-            
-            if word in keywords:
-                tokens.append(('keyword', word))
-            elif word in constants:
-                tokens.append(('keyword', word))  # 常量用关键字颜色
-            elif word in builtins:
-                tokens.append(('builtin', word))
+
+    for m in _TOKEN_RE.finditer(line):
+        kind = m.lastgroup
+        text = m.group()
+        if kind == 'IDENT':
+            if text in PYTHON_KEYWORDS:
+                tokens.append(('keyword', text))
+            elif text in PYTHON_CONSTANTS:
+                tokens.append(('keyword', text))  # 常量用关键字颜色
+            elif text in PYTHON_BUILTINS:
+                tokens.append(('builtin', text))
             else:
-                tokens.append(('text', word))
+                tokens.append(('text', text))
+        elif kind == 'STRING':
+            tokens.append(('string', text))
+        elif kind == 'NUMBER':
+            tokens.append(('number', text))
+        elif kind == 'WS':
+            tokens.append(('text', text))
         else:
-            # 操作符和其他字符
-            tokens.append(('operator', char))
-            i += 1
-    
+            tokens.append(('operator', text))
+
     return tokens
 
 def calculate_adaptive_code_display():
@@ -556,7 +777,7 @@ def calculate_adaptive_code_display():
         # 自适应边距
         margin_top = max(5, min(15, available_height // 40))
         
-        logger.debug(f"🎯 自适应代码显示: {total_code_lines}行 -> 字体{font_size}px, 行高{line_height}px, 可见{visible_lines}行")
+        logger.debug("🎯 自适应代码显示: %d行 -> 字体%dpx, 行高%dpx, 可见%d行", total_code_lines, font_size, line_height, visible_lines)
         
         return {
             'line_height': line_height,
@@ -585,7 +806,7 @@ def calculate_adaptive_code_display():
 
 def create_code_window():
     """创建代码查看模式（集成到主窗口）"""
-    global code_window_visible, code_font, line_number_font, code_window_size, current_code
+    global code_window_visible, code_font, line_number_font, code_window_size, current_code, current_code_lines, code_view_dirty
     
     try:
         logger.info("🔍 DEBUG: create_code_window 开始执行")
@@ -619,6 +840,7 @@ class TestClass:
 test_instance = TestClass()
 test_instance.display_info()
 hello_ghostmentor()"""
+            current_code_lines = current_code.split('\n')
             logger.info("✅ 测试代码已创建")
             show_notification("📝 显示测试代码 - 代码查看模式演示", 3.0)
         
@@ -635,15 +857,17 @@ hello_ghostmentor()"""
         # 初始化代码字体（适应更大窗口）
         logger.info("🔤 开始初始化代码字体")
         try:
-            code_font = pygame.font.SysFont('consolas', 14)  # 字体稍大一些
-            line_number_font = pygame.font.SysFont('consolas', 12)
+            # 🚀 走(名称,字号)单例缓存，真正的字号由render_pygame_code_window按
+            # 自适应参数取用，这里只是预热默认字号
+            code_font = get_sysfont('consolas', 14)  # 字体稍大一些
+            line_number_font = get_sysfont('consolas', 12)
             logger.info("✅ Consolas 字体初始化成功")
         except Exception as font_error:
             logger.warning(f"⚠️ Consolas 字体失败: {font_error}, 使用备用字体")
             try:
                 # 备用字体
-                code_font = pygame.font.SysFont('courier new', 14)
-                line_number_font = pygame.font.SysFont('courier new', 12)
+                code_font = get_sysfont('courier new', 14)
+                line_number_font = get_sysfont('courier new', 12)
                 logger.info("✅ Courier New 字体初始化成功")
             except Exception as backup_font_error:
                 logger.error(f"❌ 备用字体也失败: {backup_font_error}")
@@ -652,6 +876,7 @@ hello_ghostmentor()"""
         
         # 设置代码窗口可见
         code_window_visible = True
+        code_view_dirty = True  # 🚀 作废上次的跳帧key，重开首帧必须重绘
         logger.info("🎨 代码查看模式已激活")
         show_notification("🎨 代码查看模式 (按Esc退出)", 3.0)
         
@@ -663,6 +888,90 @@ hello_ghostmentor()"""
         code_window_visible = False
         show_notification("❌ 代码查看模式启动失败", 2.0)
 
+# 🚀 语法高亮与自适应参数的记忆化缓存 - 滚动时每帧重新tokenize整段代码是代码视图最大的CPU开销
+_code_parse_cache = {'hash': None, 'highlighted': None}
+_adaptive_cache = {'key': None, 'params': None}
+
+def get_adaptive_params():
+    """取自适应显示参数（按窗口尺寸+行数缓存，渲染路径和按键滚动共用）"""
+    adaptive_key = (screen.get_width(), screen.get_height(),
+                    len(current_highlighted_code) if current_highlighted_code else 0)
+    if _adaptive_cache['key'] != adaptive_key:
+        _adaptive_cache['params'] = calculate_adaptive_code_display()
+        _adaptive_cache['key'] = adaptive_key
+    return _adaptive_cache['params']
+
+# 🚀 字体对象与token渲染结果缓存 - SysFont查找和font.render都很贵，相同(字体,文本,颜色)的结果直接复用
+_sysfont_cache = {}
+_glyph_cache = OrderedDict()
+_GLYPH_CACHE_MAX = 4096
+
+def get_sysfont(name, size):
+    """按(名称,字号)缓存的SysFont"""
+    key = (name, size)
+    font_obj = _sysfont_cache.get(key)
+    if font_obj is None:
+        font_obj = pygame.font.SysFont(name, size)
+        _sysfont_cache[key] = font_obj
+    return font_obj
+
+def render_glyph(font_obj, text, color):
+    """按(字体,文本,颜色)缓存的font.render，LRU限界防止内存膨胀"""
+    key = (id(font_obj), text, color)
+    surf = _glyph_cache.get(key)
+    if surf is None:
+        surf = font_obj.render(text, True, color)
+        if len(_glyph_cache) >= _GLYPH_CACHE_MAX:
+            _glyph_cache.popitem(last=False)
+        _glyph_cache[key] = surf
+    else:
+        _glyph_cache.move_to_end(key)
+    return surf
+
+# 🚀 整块代码预渲染画布：内容和字号不变时，滚动只是blit一个子矩形（一次memcpy），
+# 不再逐行逐token重绘。超大代码的整块画布内存不划算，超过像素预算就退回逐页渲染。
+_CODE_CANVAS_MAX_PIXELS = 8_000_000
+_code_canvas = {'key': None, 'surface': None}
+
+def _build_code_canvas(highlighted, code_font, line_number_font, line_height,
+                       canvas_width, margin_left, text_start_x, right_edge):
+    """把全部代码行一次性渲染到SRCALPHA离屏画布"""
+    canvas = pygame.Surface((canvas_width, len(highlighted) * line_height), pygame.SRCALPHA)
+    canvas.fill(SYNTAX_COLORS['background'])
+    blit_list = []
+    _colors = SYNTAX_COLORS
+    _colors_get = _colors.get
+    _text_color = _colors['text']
+    _line_number_color = _colors['line_number']
+    _render = render_glyph
+    _append = blit_list.append
+
+    for line_idx, line_data in enumerate(highlighted):
+        y_pos = line_idx * line_height
+        line_num_text = _render(line_number_font, f"{line_data['line_number']:3d}", _line_number_color)
+        _append((line_num_text, (margin_left, y_pos)))
+
+        x_pos = text_start_x
+        for token_type, token_text in _line_tokens(line_data):
+            if not token_text:
+                continue
+            if x_pos > right_edge:
+                break
+            color = _colors_get(token_type, _text_color)
+            try:
+                token_surface = _render(code_font, token_text, color)
+            except:
+                try:
+                    token_surface = _render(code_font, token_text, _text_color)
+                except:
+                    continue
+            _append((token_surface, (x_pos, y_pos)))
+            x_pos += token_surface.get_width()
+
+    if blit_list:
+        canvas.blits(blit_list, doreturn=False)
+    return canvas
+
 def render_pygame_code_window():
     """在主窗口上渲染代码内容 - 自适应大小版本"""
     global screen, current_highlighted_code, code_scroll_offset, current_code, code_font, line_number_font
@@ -671,15 +980,25 @@ def render_pygame_code_window():
         return
     
     try:
-        # 解析当前代码的语法高亮
+        # 解析当前代码的语法高亮（按内容hash记忆化，滚动重绘时直接命中缓存）
         if current_code:
-            current_highlighted_code = parse_code_syntax_pygame(current_code)
-        
+            code_hash = hash(current_code)
+            if _code_parse_cache['hash'] != code_hash:
+                lines = current_code_lines if current_code_lines else None
+                _code_parse_cache['highlighted'] = parse_code_syntax_pygame(current_code, lines)
+                _code_parse_cache['hash'] = code_hash
+            current_highlighted_code = _code_parse_cache['highlighted']
+
         # 清空屏幕并设置代码查看背景
         screen.fill(SYNTAX_COLORS['background'])
-        
-        # 🆕 自适应渲染参数计算
-        adaptive_params = calculate_adaptive_code_display()
+
+        # 🚀 缓存屏幕尺寸，避免在逐token循环中反复调用Python→C接口
+        screen_w = screen.get_width()
+        screen_h = screen.get_height()
+        right_edge = screen_w - 30  # 预留滚动条空间
+
+        # 🆕 自适应渲染参数计算（窗口尺寸和行数不变时复用上次结果）
+        adaptive_params = get_adaptive_params()
         line_height = adaptive_params['line_height']
         font_size = adaptive_params['font_size']
         line_number_font_size = adaptive_params['line_number_font_size']
@@ -689,13 +1008,13 @@ def render_pygame_code_window():
         margin_left = 5
         visible_lines = adaptive_params['visible_lines']
         
-        # 🆕 根据自适应参数重新创建字体
+        # 🆕 根据自适应参数获取字体（缓存命中时零开销）
         try:
-            code_font = pygame.font.SysFont('consolas', font_size)
-            line_number_font = pygame.font.SysFont('consolas', line_number_font_size)
+            code_font = get_sysfont('consolas', font_size)
+            line_number_font = get_sysfont('consolas', line_number_font_size)
         except:
-            code_font = pygame.font.SysFont('courier new', font_size)
-            line_number_font = pygame.font.SysFont('courier new', line_number_font_size)
+            code_font = get_sysfont('courier new', font_size)
+            line_number_font = get_sysfont('courier new', line_number_font_size)
         
         # 🆕 自适应标题显示
         title_text = f"🎨 代码查看器 - {adaptive_params['total_lines']} 行 | {adaptive_params['adaptation_info']} (Esc退出)"
@@ -712,54 +1031,89 @@ def render_pygame_code_window():
         if current_highlighted_code:
             title_space = 30  # 为标题预留的空间
             content_start_y = margin_top + title_space
+            total_lines = len(current_highlighted_code)
             
             # 🆕 基于自适应参数计算显示范围
-            display_lines = min(visible_lines, len(current_highlighted_code) - code_scroll_offset)
-            end_line = min(len(current_highlighted_code), code_scroll_offset + display_lines)
-            
-            for i, line_idx in enumerate(range(code_scroll_offset, end_line)):
-                line_data = current_highlighted_code[line_idx]
-                y_pos = content_start_y + i * line_height
-                
-                # 确保不超出窗口底部
-                if y_pos + line_height > screen.get_height() - 25:  # 预留状态栏空间
-                    break
-                
-                # 渲染行号
-                line_num_text = line_number_font.render(
-                    f"{line_data['line_number']:3d}", 
-                    True, 
-                    SYNTAX_COLORS['line_number']
-                )
-                screen.blit(line_num_text, (margin_left, y_pos))
-                
-                # 渲染代码tokens
-                x_pos = text_start_x
-                for token_type, token_text in line_data['tokens']:
-                    if not token_text:  # 跳过空token
-                        continue
-                        
-                    # 确保不超出屏幕右边界
-                    if x_pos > screen.get_width() - 30:  # 预留滚动条空间
+            display_lines = min(visible_lines, total_lines - code_scroll_offset)
+            end_line = min(total_lines, code_scroll_offset + display_lines)
+
+            # 🚀 优先走预渲染画布：滚动/重绘只需blit可见子矩形
+            canvas = None
+            if total_lines * line_height * screen_w <= _CODE_CANVAS_MAX_PIXELS:
+                canvas_key = (_code_parse_cache['hash'], font_size, screen_w, line_height)
+                if _code_canvas['key'] != canvas_key:
+                    _code_canvas['surface'] = _build_code_canvas(
+                        current_highlighted_code, code_font, line_number_font,
+                        line_height, screen_w, margin_left, text_start_x, right_edge)
+                    _code_canvas['key'] = canvas_key
+                canvas = _code_canvas['surface']
+
+            if canvas is not None:
+                visible_h = max(0, min(display_lines * line_height,
+                                       screen_h - 25 - content_start_y))
+                screen.blit(canvas, (0, content_start_y),
+                            area=pygame.Rect(0, code_scroll_offset * line_height,
+                                             screen_w, visible_h))
+            else:
+                # 超大buffer退回逐页渲染路径
+                # 🚀 批量blit：行号和token的surface都收集到一个列表，最后一次blits提交，
+                # 把每个glyph一次的Python→C往返压缩成整页一次
+                blit_list = []
+
+                # 🚀 逐token热循环里的全局名提前绑定成局部变量（LOAD_FAST比LOAD_GLOBAL+下标快）
+                _colors = SYNTAX_COLORS
+                _colors_get = _colors.get
+                _text_color = _colors['text']
+                _line_number_color = _colors['line_number']
+                _render = render_glyph
+                _append = blit_list.append
+
+                for i, line_idx in enumerate(range(code_scroll_offset, end_line)):
+                    line_data = current_highlighted_code[line_idx]
+                    y_pos = content_start_y + i * line_height
+
+                    # 确保不超出窗口底部
+                    if y_pos + line_height > screen_h - 25:  # 预留状态栏空间
                         break
-                        
-                    color = SYNTAX_COLORS.get(token_type, SYNTAX_COLORS['text'])
-                    try:
-                        token_surface = code_font.render(token_text, True, color)
-                        screen.blit(token_surface, (x_pos, y_pos))
-                        x_pos += token_surface.get_width()
-                    except:
-                        # 如果渲染失败，使用默认颜色
+
+                    # 渲染行号（glyph缓存，滚动时同一行号不重复渲染）
+                    line_num_text = _render(
+                        line_number_font,
+                        f"{line_data['line_number']:3d}",
+                        _line_number_color
+                    )
+                    _append((line_num_text, (margin_left, y_pos)))
+
+                    # 渲染代码tokens
+                    x_pos = text_start_x
+                    for token_type, token_text in _line_tokens(line_data):
+                        if not token_text:  # 跳过空token
+                            continue
+
+                        # 确保不超出屏幕右边界
+                        if x_pos > right_edge:
+                            break
+
+                        color = _colors_get(token_type, _text_color)
                         try:
-                            token_surface = code_font.render(token_text, True, SYNTAX_COLORS['text'])
-                            screen.blit(token_surface, (x_pos, y_pos))
+                            token_surface = _render(code_font, token_text, color)
+                            _append((token_surface, (x_pos, y_pos)))
                             x_pos += token_surface.get_width()
                         except:
-                            # 最后的备用方案 - 跳过这个token
-                            pass
+                            # 如果渲染失败，使用默认颜色
+                            try:
+                                token_surface = _render(code_font, token_text, _text_color)
+                                _append((token_surface, (x_pos, y_pos)))
+                                x_pos += token_surface.get_width()
+                            except:
+                                # 最后的备用方案 - 跳过这个token
+                                pass
+
+                # 一次性提交整页blit
+                if blit_list:
+                    screen.blits(blit_list, doreturn=False)
             
             # 🆕 智能滚动指示器显示
-            total_lines = len(current_highlighted_code)
             if total_lines > visible_lines:
                 render_adaptive_code_scrollbar(adaptive_params)
                 
@@ -771,15 +1125,21 @@ def render_pygame_code_window():
             
             try:
                 status_surface = line_number_font.render(status_text, True, (180, 180, 180))
-                screen.blit(status_surface, (margin_left, screen.get_height() - 20))
+                screen.blit(status_surface, (margin_left, screen_h - 20))
             except:
                 # 状态栏渲染失败的备用方案
                 simple_status = f"{code_scroll_offset + 1}/{total_lines}"
                 status_surface = line_number_font.render(simple_status, True, (180, 180, 180))
-                screen.blit(status_surface, (margin_left, screen.get_height() - 20))
+                screen.blit(status_surface, (margin_left, screen_h - 20))
         
     except Exception as e:
-        logger.error(f"渲染代码内容失败: {e}")
+        logger.error("渲染代码内容失败: %s", e)
+
+# 🚀 滚动条进度文字的字体惰性单例（failed标记避免失败后每帧重试SysFont）
+_progress_font = None
+_progress_font_failed = False
+# 🚀 滚动条轨道（背景+边框）静态不变，预渲染成小surface，每帧1次blit+1次thumb填充
+_scrollbar_bg_cache = {'key': None, 'surface': None}
 
 def render_adaptive_code_scrollbar(adaptive_params):
     """🆕 渲染自适应代码窗口滚动条"""
@@ -802,10 +1162,16 @@ def render_adaptive_code_scrollbar(adaptive_params):
         scrollbar_height = screen.get_height() - title_space - status_space
         scrollbar_y = title_space
         
-        # 滚动条背景
-        bg_color = (40, 45, 50)
-        pygame.draw.rect(screen, bg_color, 
-                        (scrollbar_x, scrollbar_y, scrollbar_width, scrollbar_height))
+        # 滚动条背景+边框：🚀 轨道形状只随窗口尺寸变化，预渲染后每帧直接blit
+        track_key = (scrollbar_width, scrollbar_height)
+        if _scrollbar_bg_cache['key'] != track_key:
+            track = pygame.Surface((scrollbar_width, scrollbar_height))
+            track.fill((40, 45, 50))
+            pygame.draw.rect(track, (80, 80, 80),
+                             (0, 0, scrollbar_width, scrollbar_height), 1)
+            _scrollbar_bg_cache['surface'] = track.convert()
+            _scrollbar_bg_cache['key'] = track_key
+        screen.blit(_scrollbar_bg_cache['surface'], (scrollbar_x, scrollbar_y))
         
         # 滚动条thumb
         thumb_ratio = visible_lines / total_lines
@@ -823,24 +1189,26 @@ def render_adaptive_code_scrollbar(adaptive_params):
         else:
             thumb_color = (120, 120, 150)  # 中间 - 蓝色
         
-        pygame.draw.rect(screen, thumb_color, 
-                        (scrollbar_x, thumb_y, scrollbar_width, thumb_height))
-        
-        # 滚动条边框
-        pygame.draw.rect(screen, (80, 80, 80), 
-                        (scrollbar_x, scrollbar_y, scrollbar_width, scrollbar_height), 1)
+        # thumb盖在轨道上（1px边框在轨道surface里，thumb内缩不遮边框也无妨）
+        screen.fill(thumb_color,
+                    (scrollbar_x, thumb_y, scrollbar_width, thumb_height))
         
         # 显示滚动进度百分比（小字体）
         if total_lines > 0:
             progress = int((code_scroll_offset / max(1, total_lines - visible_lines)) * 100)
-            try:
-                progress_font = pygame.font.SysFont('arial', 10)
-                progress_text = progress_font.render(f"{progress}%", True, (160, 160, 160))
-                progress_x = scrollbar_x - progress_text.get_width() - 3
-                progress_y = thumb_y + (thumb_height // 2) - (progress_text.get_height() // 2)
-                screen.blit(progress_text, (progress_x, progress_y))
-            except:
-                pass  # 进度显示失败不影响主要功能
+            global _progress_font, _progress_font_failed
+            if not _progress_font_failed:
+                try:
+                    # 🚀 每帧重建SysFont是pygame最慢的API之一，惰性单例只构建一次
+                    if _progress_font is None:
+                        _progress_font = get_sysfont('arial', 10)
+                    progress_text = render_glyph(_progress_font, f"{progress}%", (160, 160, 160))
+                    progress_x = scrollbar_x - progress_text.get_width() - 3
+                    progress_y = thumb_y + (thumb_height // 2) - (progress_text.get_height() // 2)
+                    screen.blit(progress_text, (progress_x, progress_y))
+                except:
+                    # 🚀 字体创建失败基本是永久性的，标记后不再每帧走异常路径
+                    _progress_font_failed = True
                 
     except Exception as e:
         logger.error(f"渲染自适应滚动条失败: {e}")
@@ -864,8 +1232,8 @@ def render_code_scrollbar(visible_lines):
         scrollbar_height = screen.get_height() - 60
         scrollbar_y = 35
         
-        pygame.draw.rect(screen, (50, 50, 50), 
-                        (scrollbar_x, scrollbar_y, scrollbar_width, scrollbar_height))
+        screen.fill((50, 50, 50),
+                    (scrollbar_x, scrollbar_y, scrollbar_width, scrollbar_height))
         
         thumb_height = max(15, (visible_lines / total_lines) * scrollbar_height)
         if total_lines > visible_lines:
@@ -873,17 +1241,20 @@ def render_code_scrollbar(visible_lines):
         else:
             thumb_y = scrollbar_y
         
-        pygame.draw.rect(screen, (120, 120, 120), 
-                        (scrollbar_x, thumb_y, scrollbar_width, thumb_height))
+        screen.fill((120, 120, 120),
+                    (scrollbar_x, thumb_y, scrollbar_width, thumb_height))
 
 def close_code_window():
     """关闭代码查看模式"""
-    global code_window_visible, code_scroll_offset, normal_window_size
+    global code_window_visible, code_scroll_offset, normal_window_size, code_view_dirty
     
     try:
         if code_window_visible:
             code_window_visible = False
             code_scroll_offset = 0  # 重置滚动位置
+            # 🚀 滚动归零后同样的代码+窗口尺寸会复现关窗前的跳帧key，
+            # 置脏保证下次打开的首帧不被空闲检测跳过
+            code_view_dirty = True
             
             # 🆕 恢复到正常窗口大小 - 已禁用，保持当前窗口尺寸
             # logger.info("🖥️ 恢复到正常窗口尺寸")
@@ -904,7 +1275,8 @@ def show_screenshot_preview():
             return
         
         screenshot_preview_visible = True
-        screenshot_preview_timer = time.time() + 5.0  # 5秒后自动关闭
+        screenshot_preview_timer = time.time() + 5.0  # 仅供界面显示剩余秒数
+        pygame.time.set_timer(PREVIEW_EXPIRE_EVT, 5000, loops=1)  # 到期由SDL投递事件
         
         logger.info("📷 截图预览窗口已显示")
         show_notification("📷 截图成功！预览窗口已显示 (按 P 关闭)", 3.0)
@@ -915,12 +1287,17 @@ def show_screenshot_preview():
 
 def close_screenshot_preview():
     """关闭截图预览窗口"""
-    global screenshot_preview_visible, current_screenshot
+    global screenshot_preview_visible, current_screenshot, current_screenshot_thumb
+    global _preview_surface, _preview_surface_key
     
     try:
         if screenshot_preview_visible:
             screenshot_preview_visible = False
+            pygame.time.set_timer(PREVIEW_EXPIRE_EVT, 0)  # 取消未触发的到期定时器
             current_screenshot = None  # 释放内存
+            current_screenshot_thumb = None
+            _preview_surface = None  # 🚀 释放缓存的预览surface
+            _preview_surface_key = None
             logger.info("📷 截图预览窗口已关闭")
             show_notification("📷 截图预览已关闭", 1.5)
     except Exception as e:
@@ -984,19 +1361,19 @@ def toggle_recording():
         logger.error(f"切换录音状态失败: {e}")
         show_notification(f"❌ 录音切换失败: {str(e)}", 3.0)
 
+# 🚀 预览surface缓存：截图在预览期间不变，缩放+fromstring+convert只做一次
+_preview_surface = None
+_preview_surface_key = None
+
 def render_screenshot_preview():
     """渲染截图预览窗口"""
     global screen, current_screenshot, screenshot_preview_timer, screenshot_preview_filename
+    global _preview_surface, _preview_surface_key
     
     if not screenshot_preview_visible or not current_screenshot or not screen:
         return
     
     try:
-        # 检查自动关闭计时器
-        if time.time() > screenshot_preview_timer:
-            close_screenshot_preview()
-            return
-        
         # 清空屏幕背景
         preview_bg_color = (20, 25, 30)  # 深色背景
         screen.fill(preview_bg_color)
@@ -1020,12 +1397,30 @@ def render_screenshot_preview():
         new_width = int(img_width * scale)
         new_height = int(img_height * scale)
         
-        # 调整截图尺寸
-        resized_screenshot = current_screenshot.resize((new_width, new_height), Image.Resampling.LANCZOS)
-        
-        # 转换为pygame surface
-        img_string = resized_screenshot.tobytes()
-        img_surface = pygame.image.fromstring(img_string, (new_width, new_height), resized_screenshot.mode)
+        # 调整截图尺寸：🚀 结果surface按(截图,窗口尺寸)缓存，同一张预览图
+        # 只做一次缩放+fromstring+convert，后续帧直接blit
+        preview_key = (id(current_screenshot), window_width, window_height)
+        if _preview_surface_key != preview_key:
+            # 从预缩放的缩略图缩放，避免对整张图做LANCZOS；但目标尺寸超过
+            # 缩略图时（大窗口+4K截图的30%可达1152x648）放大缩略图会明显
+            # 发糊，这种情况退回从原图LANCZOS缩小，和基线画质一致
+            preview_src = current_screenshot_thumb if current_screenshot_thumb is not None else current_screenshot
+            if (preview_src is not current_screenshot and
+                    (new_width > preview_src.width or new_height > preview_src.height)):
+                preview_src = current_screenshot
+            resample = (Image.Resampling.BILINEAR if preview_src is current_screenshot_thumb
+                        else Image.Resampling.LANCZOS)
+            resized_screenshot = preview_src.resize((new_width, new_height), resample)
+            # 🚀 frombuffer直接包住像素缓冲，不像fromstring那样再拷贝一份进Surface；
+            # asarray拿PIL像素的零拷贝视图，省掉tobytes()的整图复制
+            img_surface = pygame.image.frombuffer(
+                np.asarray(resized_screenshot), (new_width, new_height), resized_screenshot.mode)
+            # convert到显示像素格式：未convert的surface每次blit都要现场做像素格式
+            # 转换，转换一次后blit走SDL同格式快速路径（同时把像素复制进新surface，
+            # 不再依赖临时buffer的生命周期）
+            _preview_surface = img_surface.convert()
+            _preview_surface_key = preview_key
+        img_surface = _preview_surface
         
         # 计算居中位置
         img_x = (window_width - new_width) // 2
@@ -1038,22 +1433,25 @@ def render_screenshot_preview():
         # 绘制预览图像
         screen.blit(img_surface, (img_x, img_y))
         
-        # 绘制标题
+        # 绘制标题（文件名在预览期间不变，走渲染缓存）
         title_text = f"📷 截图预览 - {screenshot_preview_filename}"
-        title_surface = font.render(title_text, True, (255, 255, 255))
+        title_surface = render_glyph(font, title_text, (255, 255, 255))
         title_x = (window_width - title_surface.get_width()) // 2
         screen.blit(title_surface, (title_x, 5))
         
-        # 绘制状态信息
+        # 绘制状态信息：🚀 尺寸部分在预览期间不变走渲染缓存，只有倒计时逐帧渲染
         remaining_time = max(0, screenshot_preview_timer - time.time())
-        size_text = f"尺寸: {img_width}x{img_height} | 预览: {new_width}x{new_height} | {remaining_time:.1f}s后自动关闭"
-        status_surface = font.render(size_text, True, (180, 180, 180))
-        status_x = (window_width - status_surface.get_width()) // 2
-        screen.blit(status_surface, (status_x, 25))
-        
-        # 绘制操作提示
+        size_prefix = f"尺寸: {img_width}x{img_height} | 预览: {new_width}x{new_height} | "
+        prefix_surface = render_glyph(font, size_prefix, (180, 180, 180))
+        countdown_surface = font.render(f"{remaining_time:.1f}s后自动关闭", True, (180, 180, 180))
+        status_width = prefix_surface.get_width() + countdown_surface.get_width()
+        status_x = (window_width - status_width) // 2
+        screen.blit(prefix_surface, (status_x, 25))
+        screen.blit(countdown_surface, (status_x + prefix_surface.get_width(), 25))
+        
+        # 绘制操作提示（固定字符串，只在首帧真正光栅化）
         hint_text = "按 P 关闭预览 | 按 H 重新截图"
-        hint_surface = font.render(hint_text, True, (150, 200, 255))
+        hint_surface = render_glyph(font, hint_text, (150, 200, 255))
         hint_x = (window_width - hint_surface.get_width()) // 2
         hint_y = window_height - 20
         screen.blit(hint_surface, (hint_x, hint_y))
@@ -1086,41 +1484,63 @@ def update_code_window():
 
 def handle_pygame_code_window_events(event):
     """处理Pygame代码窗口事件"""
-    global code_scroll_offset, current_highlighted_code
-    
+    global code_scroll_offset, current_highlighted_code, code_view_dirty
+
     if not code_window_visible:
         return
-    
+
     if event.type == pygame.MOUSEWHEEL:
         if current_highlighted_code:
             visible_lines = (code_window_screen.get_height() - 20) // 18
             max_scroll = max(0, len(current_highlighted_code) - visible_lines)
-            
-            code_scroll_offset -= event.y * 3  # 滚动方向
-            code_scroll_offset = max(0, min(code_scroll_offset, max_scroll))
-            
-            render_pygame_code_window()
+
+            new_offset = max(0, min(code_scroll_offset - event.y * 3, max_scroll))
+            if new_offset == code_scroll_offset:
+                return  # 🚀 已到顶/底，偏移没变就不标脏，避免无效重绘
+            code_scroll_offset = new_offset
+
+            # 🚀 不直接渲染，只标记脏位，由主循环下一帧统一重绘
+            # （高DPI触摸板会在一帧内连发多个滚轮事件，直接渲染会重复绘制）
+            code_view_dirty = True
+
+def downscale_for_upload(image, max_edge=2048):
+    """上传前压缩截图尺寸 - GPT vision高清模式最长边也只有2048px，全分辨率上传纯属浪费"""
+    try:
+        if image and max(image.size) > max_edge:
+            original_size = image.size
+            image = image.copy()  # 不修改原图，预览等功能还要用
+            image.thumbnail((max_edge, max_edge), Image.BILINEAR)
+            logger.debug("📉 上传前缩小截图: %s -> %s", original_size, image.size)
+        return image
+    except Exception as e:
+        logger.warning(f"截图缩小失败，使用原图: {e}")
+        return image
 
 async def send_to_openai(image, text):
     """Send screen image and transcribed text to OpenAI API using API manager."""
-    global current_code
+    global current_code, current_code_lines
     try:
         if image is None:
             logger.warning("No screen capture available")
             text_queue.put("Error: No screen capture available")
             return None
-        
+
         set_app_state("processing")
-        
+
+        # 🚀 先缩小再上传，4K屏可减少4-8倍的编码和传输开销；缩放本身也
+        # 丢到线程池，不占用事件循环
+        image = await asyncio.to_thread(downscale_for_upload, image)
+
         # Use API manager for analysis
         response = await api_manager.analyze_screen(image, text)
         
         if response:
             # 提取代码块
-            extracted_code = extract_code_from_response(response)
+            extracted_code, extracted_lines = extract_code_from_response(response)
             if extracted_code:
                 current_code = extracted_code
-                logger.info(f"🎨 已提取代码，共 {len(extracted_code.split(chr(10)))} 行")
+                current_code_lines = extracted_lines
+                logger.info(f"🎨 已提取代码，共 {len(extracted_lines)} 行")
                 show_notification("🎨 检测到代码，按 Ctrl+C 查看", 3.0)
             
             # Get formatted history for display
@@ -1141,7 +1561,7 @@ async def send_to_openai(image, text):
 
 async def send_text_to_openai(text):
     """Send only text to OpenAI API for pure conversation."""
-    global current_code
+    global current_code, current_code_lines
     try:
         if not text.strip():
             logger.warning("No text to send")
@@ -1163,10 +1583,11 @@ async def send_text_to_openai(text):
         if response:
             logger.info(f"🔍 DEBUG: 收到回复: '{response[:100]}...'")
             # 提取代码块
-            extracted_code = extract_code_from_response(response)
+            extracted_code, extracted_lines = extract_code_from_response(response)
             if extracted_code:
                 current_code = extracted_code
-                logger.info(f"🎨 已提取代码，共 {len(extracted_code.split(chr(10)))} 行")
+                current_code_lines = extracted_lines
+                logger.info(f"🎨 已提取代码，共 {len(extracted_lines)} 行")
                 show_notification("🎨 检测到代码，按 Ctrl+C 查看", 3.0)
             
             # Get formatted history for display
@@ -1188,17 +1609,18 @@ async def send_text_to_openai(text):
 
 async def send_multiple_screenshots_to_openai(user_text: str = ""):
     """Send multiple screenshots to OpenAI API for comprehensive analysis."""
-    global screenshot_collection, current_code
+    global screenshot_images, current_code, current_code_lines
     try:
-        if not screenshot_collection:
+        if not screenshot_images:
             logger.warning("No screenshots in collection")
             text_queue.put("Error: No screenshots available")
             return None
         
         set_app_state("processing")
         
-        # Extract all images from screenshot collection
-        images = [screenshot_data[0] for screenshot_data in screenshot_collection]
+        # Extract all images from screenshot collection (缩小后再上传，批量缩放走线程池)
+        images = await asyncio.to_thread(
+            lambda: [downscale_for_upload(img) for img in screenshot_images])
         
         logger.info(f"🖼️ Sending {len(images)} screenshots to OpenAI for analysis...")
         
@@ -1207,10 +1629,11 @@ async def send_multiple_screenshots_to_openai(user_text: str = ""):
         
         if response:
             # 提取代码块
-            extracted_code = extract_code_from_response(response)
+            extracted_code, extracted_lines = extract_code_from_response(response)
             if extracted_code:
                 current_code = extracted_code
-                logger.info(f"🎨 已从多图分析中提取代码，共 {len(extracted_code.split(chr(10)))} 行")
+                current_code_lines = extracted_lines
+                logger.info(f"🎨 已从多图分析中提取代码，共 {len(extracted_lines)} 行")
                 show_notification("🎨 检测到代码，按 Ctrl+C 查看", 3.0)
             
             # Get formatted history for display
@@ -1231,7 +1654,7 @@ async def send_multiple_screenshots_to_openai(user_text: str = ""):
 
 async def process_openai():
     """智能多模态分析处理器"""
-    global current_transcript, has_recent_screenshot, screenshot_collection
+    global current_transcript, has_recent_screenshot, screenshot_images
     try:
         # 🚀 立即关闭截图预览窗口（如果打开着的话）
         if screenshot_preview_visible:
@@ -1242,7 +1665,7 @@ async def process_openai():
         user_text = current_transcript.strip()
         has_voice = bool(user_text)
         has_screen = has_recent_screenshot
-        screenshot_count = len(screenshot_collection)
+        screenshot_count = len(screenshot_images)
         
         logger.info(f"🧠 智能分析开始: voice={has_voice}, screen={has_screen}, screenshots={screenshot_count}")
         logger.info(f"🔍 语音内容: '{user_text}' (长度: {len(user_text)})")
@@ -1263,7 +1686,8 @@ async def process_openai():
                     await send_to_openai(current_screenshot, user_text)
                 else:
                     # 如果没有保存的截图，重新截取
-                    image = capture_screen()
+                    # 🚀 抓屏耗时50-200ms，丢到线程池，别卡住事件循环里的AI流式输出
+                    image = await asyncio.to_thread(capture_screen)
                     if image:
                         await send_to_openai(image, user_text)
                     else:
@@ -1291,7 +1715,7 @@ async def process_openai():
                     await send_to_openai(current_screenshot, "")
                 else:
                     # 重新截图
-                    image = capture_screen()
+                    image = await asyncio.to_thread(capture_screen)
                     if image:
                         await send_to_openai(image, "")
                     else:
@@ -1329,14 +1753,30 @@ def update_overlay():
     """Update overlay text from the queue."""
     global overlay_text, last_response_time, scroll_offset
     try:
-        while not text_queue.empty():
-            overlay_text = text_queue.get()
-            # Calculate wrapped lines to set scroll_offset to show latest response
-            wrapped_lines = wrap_text(overlay_text, 480, font)
-            max_lines = 8  # Maximum lines visible in HUD
-            scroll_offset = max(0, len(wrapped_lines) - max_lines)  # Show latest lines
-            last_response_time = time.time()
-            logger.info(f"Overlay updated with: {overlay_text}, scroll_offset={scroll_offset}")
+        # 🚀 空队列快速路径：绝大多数帧没有新消息，不值得每帧构造/捕获一次Empty异常。
+        # empty()只是近似值没关系——漏看的消息下一帧（16ms后）就会被取走
+        if text_queue.empty():
+            return
+
+        # 一次排空队列，只对最后一条消息做换行计算（中间消息反正会被覆盖）。
+        # 排空本身用get_nowait，不依赖empty()的瞬时值
+        message = None
+        try:
+            while True:
+                message = text_queue.get_nowait()
+        except Empty:
+            pass
+        if message is None:
+            return
+
+        overlay_text = message
+        # Calculate wrapped lines to set scroll_offset to show latest response
+        # 宽度与渲染路径保持一致，避免滚动偏移和实际显示行数对不上
+        wrapped_lines = wrap_text_cached(overlay_text, window_settings['width'] - 20, font)
+        max_lines = 8  # Maximum lines visible in HUD
+        scroll_offset = max(0, len(wrapped_lines) - max_lines)  # Show latest lines
+        last_response_time = time.time()
+        logger.info("Overlay updated with: %s, scroll_offset=%s", overlay_text, scroll_offset)
     except Exception as e:
         logger.error(f"Overlay update error: {e}")
 
@@ -1348,7 +1788,7 @@ def set_window_opacity(opacity_value):
             window_opacity = max(0, min(255, opacity_value))  # Clamp between 0-255
             ctypes.windll.user32.SetLayeredWindowAttributes(hwnd, 0, window_opacity, 2)
             percentage = round((window_opacity / 255) * 100)
-            logger.info(f"🎨 Window opacity set to {window_opacity}/255 ({percentage}%)")
+            logger.info("🎨 Window opacity set to %d/255 (%d%%)", window_opacity, percentage)
     except Exception as e:
         logger.error(f"Error setting window opacity: {e}")
 
@@ -1405,18 +1845,8 @@ def resize_window(new_size: tuple, mode: str = "normal"):
         logger.info("🔄 计算窗口位置...")
         if mode == "code":
             # 代码模式时居中显示
-            try:
-                import tkinter as tk
-                root = tk.Tk()
-                screen_width = root.winfo_screenwidth()
-                screen_height = root.winfo_screenheight()
-                root.destroy()
-                logger.info(f"✅ 屏幕尺寸: {screen_width}x{screen_height}")
-            except:
-                # 备用方案
-                screen_width = 1920
-                screen_height = 1080
-                logger.warning("⚠️ 使用默认屏幕尺寸: 1920x1080")
+            screen_width, screen_height = get_screen_size()
+            logger.info(f"✅ 屏幕尺寸: {screen_width}x{screen_height}")
             
             window_x = (screen_width - new_width) // 2
             window_y = (screen_height - new_height) // 2
@@ -1536,26 +1966,87 @@ def reset_window_size():
     except Exception as e:
         logger.error(f"窗口重置失败: {e}")
 
+# 🚀 屏幕尺寸缓存：之前为拿两个整数起一个完整的Tk解释器（几十毫秒），
+# 改用GetSystemMetrics一次syscall并缓存
+_screen_size_cache = None
+
+def get_screen_size():
+    """获取主屏幕尺寸（首次用GetSystemMetrics，之后直接读缓存）"""
+    global _screen_size_cache
+    if _screen_size_cache is None:
+        try:
+            _screen_size_cache = (ctypes.windll.user32.GetSystemMetrics(0),
+                                  ctypes.windll.user32.GetSystemMetrics(1))
+        except Exception as e:
+            logger.warning(f"⚠️ 获取屏幕尺寸失败，使用默认1920x1080: {e}")
+            _screen_size_cache = (1920, 1080)
+    return _screen_size_cache
+
+# 🚀 CJK字体发现只做一次并落盘缓存：SysFont对每个候选名都要扫系统字体注册表，
+# 解析出字体文件路径后，各字号直接用Font(path, size)构建（只是打开已知文件）
+_FONT_CACHE_FILE = os.path.join(os.path.expanduser('~'), '.ghostmentor', 'font_cache.json')
+CHINESE_FONTS = ['microsoft yahei', 'simsun', 'simhei', 'dengxian', 'segoe ui', 'arial unicode ms']
+
+def _resolve_cjk_font_path():
+    """解析支持中文的字体文件路径（带磁盘缓存，命中时启动零探测）"""
+    try:
+        with open(_FONT_CACHE_FILE, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get('path') and os.path.exists(cached['path']):
+            logger.debug("🎨 字体缓存命中: %s", cached['name'])
+            return cached['name'], cached['path']
+    except Exception:
+        pass  # 缓存不存在/损坏/字体被卸载，走正常探测
+
+    for font_name in CHINESE_FONTS:
+        try:
+            path = pygame.font.match_font(font_name)
+        except Exception:
+            continue
+        if path:
+            try:
+                os.makedirs(os.path.dirname(_FONT_CACHE_FILE), exist_ok=True)
+                with open(_FONT_CACHE_FILE, 'w', encoding='utf-8') as f:
+                    json.dump({'name': font_name, 'path': path}, f)
+            except Exception as e:
+                logger.debug(f"写入字体缓存失败: {e}")
+            return font_name, path
+    return None, None
+
 last_keep_on_top_log = 0
+# 🚀 上次真正写入的样式位和不透明度：每个user32调用都是一次syscall往返，
+# 位模式没变就不再重复写
+_last_ex_style = None
+_last_applied_opacity = None
+_last_keep_on_top_call = 0.0
 
 def keep_on_top():
     """Ensure the window stays on top and maintains ghost properties."""
-    global last_keep_on_top_log
+    global last_keep_on_top_log, _last_ex_style, _last_applied_opacity, _last_keep_on_top_call
     try:
+        # 🚀 节流到最多2Hz：焦点事件抖动（如切换窗口时连发的LOST/GAINED）只处理一次
+        now = time.time()
+        if now - _last_keep_on_top_call < 0.5:
+            return
+        _last_keep_on_top_call = now
         if hwnd:
             win32gui.SetWindowPos(hwnd, win32con.HWND_TOPMOST, 0, 0, 0, 0, win32con.SWP_NOMOVE | win32con.SWP_NOSIZE)
-            
-            # 🆕 确保幽灵窗口属性保持不变
+
+            # 🆕 确保幽灵窗口属性保持不变（只在位模式真的变了时才写回）
             ex_style = win32gui.GetWindowLong(hwnd, win32con.GWL_EXSTYLE)
-            ex_style |= (win32con.WS_EX_LAYERED | 
-                        win32con.WS_EX_NOACTIVATE | 
+            desired_style = ex_style | (win32con.WS_EX_LAYERED |
+                        win32con.WS_EX_NOACTIVATE |
                         win32con.WS_EX_TOOLWINDOW |
                         win32con.WS_EX_TRANSPARENT)  # 保持鼠标穿透
-            win32gui.SetWindowLong(hwnd, win32con.GWL_EXSTYLE, ex_style)
-            
-            # Ensure transparency is maintained
-            ctypes.windll.user32.SetLayeredWindowAttributes(hwnd, 0, window_opacity, 2)
-            
+            if desired_style != ex_style or desired_style != _last_ex_style:
+                win32gui.SetWindowLong(hwnd, win32con.GWL_EXSTYLE, desired_style)
+                _last_ex_style = desired_style
+
+            # Ensure transparency is maintained（不透明度没变就跳过）
+            if window_opacity != _last_applied_opacity:
+                ctypes.windll.user32.SetLayeredWindowAttributes(hwnd, 0, window_opacity, 2)
+                _last_applied_opacity = window_opacity
+
             # Only log once every 5 seconds to avoid spam
             current_time = time.time()
             if current_time - last_keep_on_top_log > 5:
@@ -1575,6 +2066,8 @@ def create_hud():
             logger.info("💻 Console window hidden for clean experience")
 
         pygame.init()
+        # SDL_VIDEO_WINDOW_POS只在这里写一次用于初始定位；
+        # 运行期位置一律走window_x/window_y整型变量，不回读/解析环境变量
         os.environ['SDL_VIDEO_WINDOW_POS'] = f"{window_x},{window_y}"
         
         # Use window settings from config
@@ -1609,20 +2102,33 @@ def create_hud():
             subtitle_font_size = ui_settings['subtitle_font_size']
             
             # Try to use system fonts that support Chinese characters
-            # List of fonts that support Chinese, in order of preference
-            chinese_fonts = ['microsoft yahei', 'simsun', 'simhei', 'dengxian', 'segoe ui', 'arial unicode ms']
+            # 🚀 先解析字体文件路径（带磁盘缓存），各字号直接从路径构建，
+            # 不再对每个候选字体名重复扫字体注册表
             font_found = False
-            
-            for font_name in chinese_fonts:
+            resolved_name, resolved_path = _resolve_cjk_font_path()
+            if resolved_path:
                 try:
-                    font = pygame.font.SysFont(font_name, font_size)
-                    title_font = pygame.font.SysFont(font_name, title_font_size, bold=True)
-                    subtitle_font = pygame.font.SysFont(font_name, subtitle_font_size)
+                    font = pygame.font.Font(resolved_path, font_size)
+                    title_font = pygame.font.Font(resolved_path, title_font_size)
+                    title_font.set_bold(True)
+                    subtitle_font = pygame.font.Font(resolved_path, subtitle_font_size)
                     font_found = True
-                    logger.info(f"🎨 Using font: {font_name}")
-                    break
-                except:
-                    continue
+                    logger.info(f"🎨 Using font: {resolved_name}")
+                except Exception as e:
+                    logger.warning(f"⚠️ 从缓存路径加载字体失败，回退SysFont探测: {e}")
+
+            if not font_found:
+                # 🚀 SysFont支持逗号分隔的候选列表，自己选第一个可用的：
+                # 一次调用代替逐名try/except循环（每次SysFont都要扫字体注册表）
+                try:
+                    candidates = ','.join(CHINESE_FONTS)
+                    font = pygame.font.SysFont(candidates, font_size)
+                    title_font = pygame.font.SysFont(candidates, title_font_size, bold=True)
+                    subtitle_font = pygame.font.SysFont(candidates, subtitle_font_size)
+                    font_found = True
+                    logger.info("🎨 Using font from candidate list")
+                except Exception:
+                    pass
             
             if not font_found:
                 # Fallback to default fonts
@@ -1662,21 +2168,22 @@ def move_window(dx, dy):
         window_height = window_settings['height']
         
         # Ensure window stays within screen bounds
-        # TODO: Get actual screen resolution instead of hardcoded values
-        screen_width = 1920  # Could be made configurable
-        screen_height = 1080
+        # 🚀 真实分辨率走缓存的GetSystemMetrics查询，修掉硬编码1080p的TODO
+        screen_width, screen_height = get_screen_size()
         
         window_x = max(0, min(window_x, screen_width - window_width))
         window_y = max(0, min(window_y, screen_height - window_height))
         
         if hwnd:
-            win32gui.SetWindowPos(hwnd, win32con.HWND_TOPMOST, 
-                                window_x, window_y, 0, 0, 
-                                win32con.SWP_NOSIZE | win32con.SWP_NOZORDER)
-            # Maintain transparency after moving
-            set_window_opacity(window_opacity)
+            # 🚀 SWP_NOZORDER下插入位置参数被忽略（原HWND_TOPMOST是无效意图），
+            # SWP_NOACTIVATE避免移动窗口时抢焦点；透明度是WS_EX_LAYERED属性，
+            # 移动不影响它，不需要每次move重新SetLayeredWindowAttributes
+            win32gui.SetWindowPos(hwnd, 0,
+                                window_x, window_y, 0, 0,
+                                win32con.SWP_NOSIZE | win32con.SWP_NOZORDER |
+                                win32con.SWP_NOACTIVATE)
             show_notification(f"📍 Moved to ({window_x}, {window_y})", 1.0)
-            logger.info(f"🍎 Window moved to ({window_x}, {window_y}) with transparency maintained")
+            logger.info("🍎 Window moved to (%d, %d)", window_x, window_y)
             
             # Update config with new position
             config.set('window_settings.x', window_x)
@@ -1685,98 +2192,91 @@ def move_window(dx, dy):
         logger.error(f"Error moving window: {e}")
         set_app_state("error")
 
-def draw_help_menu():
-    """Draw a beautiful help menu showing keyboard shortcuts."""
-    global help_menu_alpha, title_font, font, show_help_menu
-    
-    if not show_help_menu:
-        if help_menu_alpha > 0:
-            help_menu_alpha = max(0, help_menu_alpha - 10)  # Fade out
-        else:
-            return
-    else:
-        help_menu_alpha = min(255, help_menu_alpha + 15)  # Fade in
-    
-    # Help menu dimensions and position
-    menu_width = 420
-    menu_height = 500  # Increased height for more shortcuts
-    menu_x = (500 - menu_width) // 2  # Center horizontally
-    menu_y = 20
-    
-    # Create semi-transparent surface for the help menu
+# 🚀 帮助菜单surface缓存 - 内容是静态的，只需构建一次，淡入淡出用set_alpha实现
+# （菜单尺寸随窗口变化时不需要重建：render_help_menu按当前尺寸裁剪blit位置）
+_help_menu_cache = {'surface': None}
+_key_label_cache = {}  # 组合键标签文本 -> 已渲染surface（只在一次性构建里去重同名标签）
+
+# 🚀 快捷键表是常量数据，放模块级元组：单次分配、不可变，构建菜单时直接引用
+_SHORTCUTS = (
+    ("截取屏幕", "Ctrl", "H"),
+    ("截图预览", "Ctrl", "P"),
+    ("清除所有截图", "Ctrl", "X"),
+    ("下一张截图", "Ctrl", "N"),
+    ("上一张截图", "Ctrl", "M"),
+    ("开始/停止录音", "Ctrl", "V"),
+    ("智能AI分析", "Ctrl", "Enter"),
+    ("查看上下文状态", "Ctrl", "I"),
+    ("清除所有内容", "Ctrl", "G"),
+    ("切换显示/隐藏", "Ctrl", "B"),
+    ("代码窗口", "Ctrl", "C"),
+    ("放大窗口", "Ctrl+Shift", "="),
+    ("缩小窗口", "Ctrl+Shift", "-"),
+    ("重置窗口大小", "Ctrl+Shift", "R"),
+    ("上移窗口", "Ctrl", "↑"),
+    ("下移窗口", "Ctrl", "↓"),
+    ("左移窗口", "Ctrl", "←"),
+    ("右移窗口", "Ctrl", "→"),
+    ("增加透明度", "Ctrl", "PgUp/="),
+    ("减少透明度", "Ctrl", "PgDn/-"),
+    ("显示/隐藏帮助", "Ctrl", "?"),
+    ("退出程序", "Alt", "F4"),
+)
+
+def _build_help_menu_surface(menu_width, menu_height):
+    """构建完整不透明的帮助菜单surface（只在首次显示时调用一次）"""
     help_surface = pygame.Surface((menu_width, menu_height), pygame.SRCALPHA)
-    
+
     # Background with gradient effect
-    bg_color = (25, 35, 45, int(help_menu_alpha * 0.95))  # Dark blue-gray
-    border_color = (70, 130, 180, help_menu_alpha)  # Steel blue
-    
+    bg_color = (25, 35, 45, 242)  # Dark blue-gray
+    border_color = (70, 130, 180, 255)  # Steel blue
+
     # Draw background
     pygame.draw.rect(help_surface, bg_color, (0, 0, menu_width, menu_height), border_radius=12)
     pygame.draw.rect(help_surface, border_color, (0, 0, menu_width, menu_height), width=2, border_radius=12)
-    
+
     # Title
-    title_color = (255, 255, 255, help_menu_alpha)
     title_text = title_font.render("👻 幽灵窗口 - 键盘快捷键", True, (255, 255, 255))
     title_rect = title_text.get_rect(center=(menu_width // 2, 30))
     help_surface.blit(title_text, title_rect)
-    
-    # Shortcuts data
-    shortcuts = [
-        ("截取屏幕", "Ctrl", "H"),
-        ("截图预览", "Ctrl", "P"),
-        ("清除所有截图", "Ctrl", "X"),
-        ("下一张截图", "Ctrl", "N"),
-        ("上一张截图", "Ctrl", "M"),
-        ("开始/停止录音", "Ctrl", "V"),
-        ("智能AI分析", "Ctrl", "Enter"),
-        ("查看上下文状态", "Ctrl", "I"),
-        ("清除所有内容", "Ctrl", "G"),
-        ("切换显示/隐藏", "Ctrl", "B"),
-        ("代码窗口", "Ctrl", "C"),
-        ("放大窗口", "Ctrl+Shift", "="),
-        ("缩小窗口", "Ctrl+Shift", "-"),
-        ("重置窗口大小", "Ctrl+Shift", "R"),
-        ("上移窗口", "Ctrl", "↑"),
-        ("下移窗口", "Ctrl", "↓"),
-        ("左移窗口", "Ctrl", "←"),
-        ("右移窗口", "Ctrl", "→"),
-        ("增加透明度", "Ctrl", "PgUp/="),
-        ("减少透明度", "Ctrl", "PgDn/-"),
-        ("显示/隐藏帮助", "Ctrl", "?"),
-        ("退出程序", "Alt", "F4")
-    ]
-    
-    # Draw shortcuts
+
+    # Draw shortcuts - 🚀 文字surface先收集，最后用一次blits批量提交
+    blit_list = []
     y_offset = 70
-    for i, (description, mod_key, key) in enumerate(shortcuts):
+
+    # 🚀 22个键帽尺寸样式完全相同：圆角光栅化只做一次，之后按行blit同一张模板
+    key_bg_width = 80
+    key_bg_height = 24
+    key_cap_surf = pygame.Surface((key_bg_width, key_bg_height), pygame.SRCALPHA)
+    pygame.draw.rect(key_cap_surf, (50, 60, 70, 255),
+                    (0, 0, key_bg_width, key_bg_height), border_radius=4)
+    pygame.draw.rect(key_cap_surf, (100, 120, 140, 255),
+                    (0, 0, key_bg_width, key_bg_height), width=1, border_radius=4)
+
+    for i, (description, mod_key, key) in enumerate(_SHORTCUTS):
         # Description
         desc_color = (220, 220, 220) if i % 2 == 0 else (200, 200, 200)
-        desc_text = font.render(description, True, desc_color)
-        help_surface.blit(desc_text, (20, y_offset))
-        
+        blit_list.append((font.render(description, True, desc_color), (20, y_offset)))
+
         # Key combination background
-        key_bg_width = 80
-        key_bg_height = 24
         key_bg_x = menu_width - key_bg_width - 15
         key_bg_y = y_offset - 2
-        
-        # Draw key background
-        key_bg_color = (50, 60, 70, help_menu_alpha)
-        key_border_color = (100, 120, 140, help_menu_alpha)
-        pygame.draw.rect(help_surface, key_bg_color, 
-                        (key_bg_x, key_bg_y, key_bg_width, key_bg_height), border_radius=4)
-        pygame.draw.rect(help_surface, key_border_color, 
-                        (key_bg_x, key_bg_y, key_bg_width, key_bg_height), width=1, border_radius=4)
-        
-        # Key text
+        blit_list.append((key_cap_surf, (key_bg_x, key_bg_y)))
+
+        # Key text - 按文本缓存，重复的组合键标签（如Ctrl前缀）只渲染一次
         key_text = f"{mod_key} + {key}"
-        key_surface = font.render(key_text, True, (255, 255, 255))
+        key_surface = _key_label_cache.get(key_text)
+        if key_surface is None:
+            key_surface = font.render(key_text, True, (255, 255, 255))
+            _key_label_cache[key_text] = key_surface
         key_rect = key_surface.get_rect(center=(key_bg_x + key_bg_width // 2, key_bg_y + key_bg_height // 2))
-        help_surface.blit(key_surface, key_rect)
-        
+        blit_list.append((key_surface, key_rect))
+
         y_offset += 30
+
+    help_surface.blits(blit_list, doreturn=False)
     
-    # Footer
+    # Footer - emoji文本的shaping很慢，但整个surface只构建一次，这些render也只发生一次
     footer_y = menu_height - 40
     footer_text = font.render("👻 GhostMentor Ultra - 真·幽灵模式", True, (130, 150, 170))
     footer_rect = footer_text.get_rect(center=(menu_width // 2, footer_y))
@@ -1786,169 +2286,344 @@ def draw_help_menu():
     version_text = font.render("v2.1 - 鼠标穿透·无焦点·键盘操控", True, (100, 120, 140))
     version_rect = version_text.get_rect(center=(menu_width // 2, footer_y + 15))
     help_surface.blit(version_text, version_rect)
-    
-    # Apply alpha to the entire surface
-    if help_menu_alpha < 255:
-        help_surface.set_alpha(help_menu_alpha)
-    
+
+    # 🚀 convert_alpha匹配显示格式，让后续每帧的blit走SDL的SIMD快速路径
+    return help_surface.convert_alpha()
+
+def draw_help_menu():
+    """Draw a beautiful help menu showing keyboard shortcuts."""
+    global help_menu_alpha, show_help_menu
+
+    if not show_help_menu:
+        if help_menu_alpha > 0:
+            help_menu_alpha = max(0, help_menu_alpha - 10)  # Fade out
+        else:
+            return
+    else:
+        help_menu_alpha = min(255, help_menu_alpha + 15)  # Fade in
+
+    # 🚀 完全透明时（淡出刚结束）整个渲染管线都可以跳过
+    if help_menu_alpha <= 0:
+        return
+
+    # Help menu dimensions and position
+    menu_width = 420
+    menu_height = 500  # Increased height for more shortcuts
+    menu_x = (500 - menu_width) // 2  # Center horizontally
+    menu_y = 20
+
+    # 🚀 菜单rect完全在窗口外时直接跳过blit
+    menu_rect = pygame.Rect(menu_x, menu_y, menu_width, menu_height)
+    if not menu_rect.colliderect(screen.get_rect()):
+        return
+
+    # 🚀 复用缓存的菜单surface，每帧只做一次set_alpha + blit
+    help_surface = _help_menu_cache['surface']
+    if help_surface is None:
+        help_surface = _build_help_menu_surface(menu_width, menu_height)
+        _help_menu_cache['surface'] = help_surface
+
+    # Apply fade alpha to the cached surface
+    help_surface.set_alpha(help_menu_alpha if help_menu_alpha < 255 else None)
+
     # Blit to main screen
     screen.blit(help_surface, (menu_x, menu_y))
 
+# ========== 🚀 高优先级快捷键的O(1)分发表 ==========
+# Windows在钩子返回前会阻塞所有键盘输入，所以这里必须快：
+# 一次GetAsyncKeyState查询 + 一次dict查找，替代原来的长elif链。
+# 实际动作（截图、清理、API调用等）都通过_action_queue交给worker线程执行，
+# 钩子线程只做"拦截/放行"的判定后立即返回。
+
+_action_queue = Queue()
+_action_thread = None
+
+def _action_worker():
+    """后台执行快捷键动作，避免在键盘钩子线程上做重活拖慢全系统输入"""
+    while True:
+        action = _action_queue.get()
+        try:
+            action()
+        except Exception as e:
+            logger.error(f"快捷键动作执行失败: {e}")
+
+def _start_action_worker():
+    """启动快捷键动作worker线程（幂等）"""
+    global _action_thread
+    if _action_thread is None or not _action_thread.is_alive():
+        _action_thread = Thread(target=_action_worker, daemon=True)
+        _action_thread.start()
+        logger.info("🧵 快捷键动作worker线程已启动")
+
+def _hotkey_screenshot():
+    logger.info("🥷 HIGH PRIORITY: Ctrl + H pressed (Screenshot)")
+    save_screenshot()
+    return False  # Block browser history shortcut
+
+def _hotkey_ai_analysis():
+    logger.info("🥷 HIGH PRIORITY: Ctrl + Enter pressed (AI Analysis)")
+    text_queue.put("Processing...")
+    # 🚀 不需要Future结果，用call_soon_threadsafe轻量唤醒事件循环即可
+    loop.call_soon_threadsafe(loop.create_task, process_openai())
+    return False  # Block other Ctrl+Enter actions
+
+def _hotkey_clear_all():
+    logger.info("🥷 HIGH PRIORITY: Ctrl + G pressed (Clear All)")
+    global current_transcript, has_recent_screenshot
+    current_transcript = ""
+    has_recent_screenshot = False
+    # 🆕 清除所有截图
+    clear_all_screenshots()
+    api_manager.clear_history()
+    text_queue.put("Ready...")
+    show_notification("🧹 已清除所有内容和截图", 2.0)
+    show_context_status()  # 显示清除后的状态
+    return False  # Block browser find shortcut
+
+def _hotkey_context_status():
+    logger.info("🥷 HIGH PRIORITY: Ctrl + I pressed (Show Context Status)")
+    show_context_status()
+    return False  # Block other Ctrl+I actions
+
+# 🚀 按住Ctrl+方向键时OS按重复率连发事件，每个事件都做SetWindowPos会卡顿。
+# 这里只累积位移，由主循环每帧合并成一次move_window调用。
+_pending_move = [0, 0]
+
+def _hotkey_move_up():
+    logger.info("🥷 HIGH PRIORITY: Ctrl + Up pressed (Move Window Up)")
+    _pending_move[1] -= move_step
+    return False
+
+def _hotkey_move_down():
+    logger.info("🥷 HIGH PRIORITY: Ctrl + Down pressed (Move Window Down)")
+    _pending_move[1] += move_step
+    return False
+
+def _hotkey_move_left():
+    logger.info("🥷 HIGH PRIORITY: Ctrl + Left pressed (Move Window Left)")
+    _pending_move[0] -= move_step
+    return False
+
+def _hotkey_move_right():
+    logger.info("🥷 HIGH PRIORITY: Ctrl + Right pressed (Move Window Right)")
+    _pending_move[0] += move_step
+    return False
+
+def apply_pending_move():
+    """主循环每帧调用：把累积的窗口位移一次性应用
+
+    按键重复期间每帧最多一次SetWindowPos/透明度调用/通知。
+    move_window里的config.set只改内存字典，落盘只发生在save_config，
+    所以这里不需要再给配置写入做防抖。
+    """
+    dx, dy = _pending_move[0], _pending_move[1]
+    if dx or dy:
+        _pending_move[0] -= dx
+        _pending_move[1] -= dy
+        move_window(dx, dy)
+
+def _hotkey_toggle_help():
+    logger.info("🥷 HIGH PRIORITY: Ctrl + ? pressed (Toggle Help)")
+    global show_help_menu
+    show_help_menu = not show_help_menu
+    return False  # Block other Ctrl+? actions
+
+def _hotkey_opacity_up():
+    logger.info("🥷 HIGH PRIORITY: Ctrl + PgUp/= pressed (Increase Opacity)")
+    new_opacity = min(255, window_opacity + 25)  # Increase by ~10%
+    set_window_opacity(new_opacity)
+    return False
+
+def _hotkey_opacity_down():
+    logger.info("🥷 HIGH PRIORITY: Ctrl + PgDn/- pressed (Decrease Opacity)")
+    new_opacity = max(13, window_opacity - 25)  # Decrease by ~10%, min 5%
+    set_window_opacity(new_opacity)
+    return False
+
+def _hotkey_toggle_visibility():
+    logger.info("🥷 HIGH PRIORITY: Ctrl + B pressed (Toggle Window Visibility)")
+    toggle_window_visibility()
+    return False
+
+def _hotkey_toggle_code_window():
+    logger.info("🥷 HIGH PRIORITY: Ctrl + C pressed (Toggle Code Window)")
+    toggle_code_window()
+    return False
+
+def _hotkey_toggle_preview():
+    logger.info("🥷 HIGH PRIORITY: Ctrl + P pressed (Toggle Screenshot Preview)")
+    toggle_screenshot_preview()
+    return False
+
+def _hotkey_toggle_recording():
+    logger.info("🥷 HIGH PRIORITY: Ctrl + V pressed (Toggle Recording)")
+    toggle_recording()
+    return False
+
+def _hotkey_clear_screenshots():
+    logger.info("🥷 HIGH PRIORITY: Ctrl + X pressed (Clear All Screenshots)")
+    clear_all_screenshots()
+    return False
+
+def _hotkey_next_screenshot():
+    logger.info("🥷 HIGH PRIORITY: Ctrl + N pressed (Next Screenshot)")
+    next_screenshot()
+    return False
+
+def _hotkey_prev_screenshot():
+    logger.info("🥷 HIGH PRIORITY: Ctrl + M pressed (Previous Screenshot)")
+    prev_screenshot()
+    return False
+
+# 🚀 修饰键状态直接查GetAsyncKeyState（单次syscall），绕开keyboard库内部的
+# 状态表和锁：钩子线程上每个按键事件都要查Ctrl，锁竞争会直接加按键延迟
+_VK_SHIFT, _VK_CONTROL, _VK_MENU = 0x10, 0x11, 0x12
+_GetAsyncKeyState = ctypes.windll.user32.GetAsyncKeyState
+
+def _modifier_down(vk):
+    """查询修饰键是否按下（最高位=当前按下）"""
+    return bool(_GetAsyncKeyState(vk) & 0x8000)
+
+# 以下三个handler依赖Shift状态决定是否拦截，判定必须留在钩子线程里同步完成，
+# 判定后的实际动作仍然交给worker队列。
+
+def _hotkey_equals():
+    # Ctrl + Shift + = 放大窗口；Ctrl + = 增加透明度
+    if _modifier_down(_VK_SHIFT):
+        logger.info("🥷 HIGH PRIORITY: Ctrl + Shift + = pressed (Enlarge Window)")
+        _action_queue.put(enlarge_window)
+        return False
+    _action_queue.put(_hotkey_opacity_up)
+    return False
+
+def _hotkey_minus():
+    # Ctrl + Shift + - 缩小窗口；Ctrl + - 减少透明度
+    if _modifier_down(_VK_SHIFT):
+        logger.info("🥷 HIGH PRIORITY: Ctrl + Shift + - pressed (Shrink Window)")
+        _action_queue.put(shrink_window)
+        return False
+    _action_queue.put(_hotkey_opacity_down)
+    return False
+
+def _hotkey_reset_window():
+    # Ctrl + Shift + R 重置窗口大小；不带Shift的Ctrl+R不拦截
+    if not _modifier_down(_VK_SHIFT):
+        return True
+    logger.info("🥷 HIGH PRIORITY: Ctrl + Shift + R pressed (Reset Window Size)")
+    _action_queue.put(reset_window_size)
+    return False
+
+# 需要在钩子线程同步执行判定的handler集合
+_SYNC_HOTKEYS = {_hotkey_equals, _hotkey_minus, _hotkey_reset_window}
+
+# 同一动作的键名变体（'page up'/'page_up'/'pgup'）指向同一个handler对象
+CTRL_DISPATCH = {
+    'h': _hotkey_screenshot,
+    'enter': _hotkey_ai_analysis,
+    'g': _hotkey_clear_all,
+    'i': _hotkey_context_status,
+    'up': _hotkey_move_up,
+    'down': _hotkey_move_down,
+    'left': _hotkey_move_left,
+    'right': _hotkey_move_right,
+    '/': _hotkey_toggle_help,
+    '?': _hotkey_toggle_help,
+    'page up': _hotkey_opacity_up,
+    'page_up': _hotkey_opacity_up,
+    'pgup': _hotkey_opacity_up,
+    'page down': _hotkey_opacity_down,
+    'page_down': _hotkey_opacity_down,
+    'pgdn': _hotkey_opacity_down,
+    '=': _hotkey_equals,
+    '+': _hotkey_equals,
+    '-': _hotkey_minus,
+    '_': _hotkey_minus,
+    'b': _hotkey_toggle_visibility,
+    'c': _hotkey_toggle_code_window,
+    'p': _hotkey_toggle_preview,
+    'v': _hotkey_toggle_recording,
+    'x': _hotkey_clear_screenshots,
+    'n': _hotkey_next_screenshot,
+    'm': _hotkey_prev_screenshot,
+    'r': _hotkey_reset_window,
+}
+
+# 🚀 钩子关心的键名全集：不在集合里的按键（普通打字的绝大多数）在查询
+# 修饰键状态之前就直接放行，连GetAsyncKeyState的syscall都省掉。
+# 不改用add_hotkey注册的原因：Ctrl+Shift+R这类"按Shift决定是否拦截"
+# 和窗口隐藏时只放行Ctrl+B/Alt+F4的条件拦截，add_hotkey表达不了
+_HOOK_KEYS = frozenset(CTRL_DISPATCH) | {'f4'}
+
 def setup_keybindings():
     """Set up HIGH PRIORITY universal key bindings using keyboard library."""
-    
+
     def global_key_handler(event):
         """High priority global key handler that blocks other applications."""
         try:
             # Only process key down events
             if event.event_type != keyboard.KEY_DOWN:
                 return True
-            
+
+            # 🚀 兴趣集之外的按键立即放行：普通打字完全不触碰修饰键查询
+            if event.name not in _HOOK_KEYS:
+                return True
+
             # 🔍 检查窗口隐藏状态 - 如果窗口隐藏，只处理显示窗口和退出的快捷键
             global window_hidden, running
-            
+
+            # 🚀 每个事件只查询一次修饰键状态，且直接走GetAsyncKeyState，
+            # 不经过keyboard库的内部状态锁
+            ctrl_pressed = _modifier_down(_VK_CONTROL)
+
             # Debug: Log all Ctrl key combinations to help with troubleshooting
-            if keyboard.is_pressed('ctrl'):
-                logger.debug(f"🔧 DEBUG: Ctrl + '{event.name}' detected (window_hidden: {window_hidden})")
-            
+            # 🚀 钩子线程上连f-string插值都要省：先查级别，再用%s延迟格式化
+            if ctrl_pressed and logger.isEnabledFor(logging.DEBUG):
+                logger.debug("🔧 DEBUG: Ctrl + '%s' detected (window_hidden: %s)", event.name, window_hidden)
+
             # 如果窗口隐藏，只允许显示窗口和退出程序的快捷键
             if window_hidden:
-                if keyboard.is_pressed('ctrl') and event.name == 'b':
+                if ctrl_pressed and event.name == 'b':
                     # Ctrl + B 显示窗口（这个必须保留，否则无法重新显示窗口）
                     logger.info("🥷 HIGH PRIORITY: Ctrl + B pressed (Show Window from Hidden)")
-                    toggle_window_visibility()
+                    _action_queue.put(toggle_window_visibility)
                     return False
-                elif keyboard.is_pressed('alt') and event.name == 'f4':
+                elif event.name == 'f4' and _modifier_down(_VK_MENU):
                     # Alt + F4 退出程序（这个也保留，允许在隐藏状态退出）
                     logger.info("🥷 HIGH PRIORITY: Alt + F4 pressed (Exit from Hidden)")
                     running = False
                     return False
                 else:
                     # 窗口隐藏时，其他所有快捷键都让系统正常处理
-                    logger.debug(f"🙈 Window hidden - passing through: Ctrl + {event.name}")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("🙈 Window hidden - passing through: Ctrl + %s", event.name)
                     return True
-            
-            # 窗口显示状态下，处理所有快捷键
-            if keyboard.is_pressed('ctrl'):
-                if event.name == 'h':
-                    logger.info("🥷 HIGH PRIORITY: Ctrl + H pressed (Screenshot)")
-                    save_screenshot()
-                    return False  # Block browser history shortcut
-                elif event.name == 'enter':
-                    logger.info("🥷 HIGH PRIORITY: Ctrl + Enter pressed (AI Analysis)")
-                    text_queue.put("Processing...")
-                    asyncio.run_coroutine_threadsafe(process_openai(), loop)
-                    return False  # Block other Ctrl+Enter actions
-                elif event.name == 'g':
-                    logger.info("🥷 HIGH PRIORITY: Ctrl + G pressed (Clear All)")
-                    global current_transcript, has_recent_screenshot
-                    current_transcript = ""
-                    has_recent_screenshot = False
-                    # 🆕 清除所有截图
-                    clear_all_screenshots()
-                    api_manager.clear_history()
-                    text_queue.put("Ready...")
-                    show_notification("🧹 已清除所有内容和截图", 2.0)
-                    show_context_status()  # 显示清除后的状态
-                    return False  # Block browser find shortcut
-                elif event.name == 'i':
-                    logger.info("🥷 HIGH PRIORITY: Ctrl + I pressed (Show Context Status)")
-                    show_context_status()
-                    return False  # Block other Ctrl+I actions
-                elif event.name == 'up':
-                    logger.info("🥷 HIGH PRIORITY: Ctrl + Up pressed (Move Window Up)")
-                    move_window(0, -move_step)
-                    return False  # Block other Ctrl+Up actions
-                elif event.name == 'down':
-                    logger.info("🥷 HIGH PRIORITY: Ctrl + Down pressed (Move Window Down)")
-                    move_window(0, move_step)
-                    return False  # Block other Ctrl+Down actions
-                elif event.name == 'left':
-                    logger.info("🥷 HIGH PRIORITY: Ctrl + Left pressed (Move Window Left)")
-                    move_window(-move_step, 0)
-                    return False  # Block other Ctrl+Left actions
-                elif event.name == 'right':
-                    logger.info("🥷 HIGH PRIORITY: Ctrl + Right pressed (Move Window Right)")
-                    move_window(move_step, 0)
-                    return False  # Block other Ctrl+Right actions
-                elif event.name == '/' or event.name == '?':  # Ctrl + ? to toggle help
-                    logger.info("🥷 HIGH PRIORITY: Ctrl + ? pressed (Toggle Help)")
-                    global show_help_menu
-                    show_help_menu = not show_help_menu
-                    return False  # Block other Ctrl+? actions
-                elif event.name in ['page up', 'page_up', 'pgup']:  # Ctrl + Page Up to increase opacity
-                    logger.info("🥷 HIGH PRIORITY: Ctrl + Page Up pressed (Increase Opacity)")
-                    new_opacity = min(255, window_opacity + 25)  # Increase by ~10%
-                    set_window_opacity(new_opacity)
-                    return False
-                elif event.name in ['page down', 'page_down', 'pgdn']:  # Ctrl + Page Down to decrease opacity
-                    logger.info("🥷 HIGH PRIORITY: Ctrl + Page Down pressed (Decrease Opacity)")
-                    new_opacity = max(13, window_opacity - 25)  # Decrease by ~10%, min 5%
-                    set_window_opacity(new_opacity)
-                    return False
-                elif event.name == '=' or event.name == '+':  # Ctrl + = to increase opacity (alternative)
-                    logger.info("🥷 HIGH PRIORITY: Ctrl + = pressed (Increase Opacity)")
-                    new_opacity = min(255, window_opacity + 25)  # Increase by ~10%
-                    set_window_opacity(new_opacity)
-                    return False
-                elif event.name == '-' or event.name == '_':  # Ctrl + - to decrease opacity (alternative)
-                    logger.info("🥷 HIGH PRIORITY: Ctrl + - pressed (Decrease Opacity)")
-                    new_opacity = max(13, window_opacity - 25)  # Decrease by ~10%, min 5%
-                    set_window_opacity(new_opacity)
-                    return False
-                elif event.name == 'b':  # Ctrl + B to toggle window visibility
-                    logger.info("🥷 HIGH PRIORITY: Ctrl + B pressed (Toggle Window Visibility)")
-                    toggle_window_visibility()
-                    return False
-                elif event.name == 'c':  # Ctrl + C to toggle code window
-                    logger.info("🥷 HIGH PRIORITY: Ctrl + C pressed (Toggle Code Window)")
-                    toggle_code_window()
-                    return False
-                elif event.name == 'p':  # Ctrl + P to toggle screenshot preview
-                    logger.info("🥷 HIGH PRIORITY: Ctrl + P pressed (Toggle Screenshot Preview)")
-                    toggle_screenshot_preview()
-                    return False
-                elif event.name == 'v':  # Ctrl + V to toggle recording
-                    logger.info("🥷 HIGH PRIORITY: Ctrl + V pressed (Toggle Recording)")
-                    toggle_recording()
-                    return False
-                elif event.name == 'x':  # Ctrl + X to clear all screenshots
-                    logger.info("🥷 HIGH PRIORITY: Ctrl + X pressed (Clear All Screenshots)")
-                    clear_all_screenshots()
-                    return False
-                elif event.name == 'n':  # Ctrl + N to next screenshot
-                    logger.info("🥷 HIGH PRIORITY: Ctrl + N pressed (Next Screenshot)")
-                    next_screenshot()
-                    return False
-                elif event.name == 'm':  # Ctrl + M to previous screenshot
-                    logger.info("🥷 HIGH PRIORITY: Ctrl + M pressed (Previous Screenshot)")
-                    prev_screenshot()
-                    return False
-                elif keyboard.is_pressed('shift') and event.name == '=':  # Ctrl + Shift + = to enlarge window
-                    logger.info("🥷 HIGH PRIORITY: Ctrl + Shift + = pressed (Enlarge Window)")
-                    enlarge_window()
-                    return False
-                elif keyboard.is_pressed('shift') and event.name == '-':  # Ctrl + Shift + - to shrink window
-                    logger.info("🥷 HIGH PRIORITY: Ctrl + Shift + - pressed (Shrink Window)")
-                    shrink_window()
-                    return False
-                elif keyboard.is_pressed('shift') and event.name == 'r':  # Ctrl + Shift + R to reset window size
-                    logger.info("🥷 HIGH PRIORITY: Ctrl + Shift + R pressed (Reset Window Size)")
-                    reset_window_size()
+
+            # 窗口显示状态下，O(1)分发所有Ctrl快捷键
+            if ctrl_pressed:
+                handler = CTRL_DISPATCH.get(event.name)
+                if handler is not None:
+                    if handler in _SYNC_HOTKEYS:
+                        # 拦截与否依赖Shift状态，必须同步判定
+                        return handler()
+                    # 🚀 重活交给worker线程，立即返回以免阻塞系统键盘输入
+                    _action_queue.put(handler)
                     return False
-            
-            elif keyboard.is_pressed('alt') and event.name == 'f4':
+
+            elif event.name == 'f4' and _modifier_down(_VK_MENU):
                 logger.info("🥷 HIGH PRIORITY: Alt + F4 pressed (Exit GhostMentor)")
                 running = False
                 return False  # Block system Alt+F4
-        
+
         except Exception as e:
             logger.error(f"Error in global key handler: {e}")
-        
+
         # Let all other key events pass through normally
         return True
 
     try:
+        # 启动动作worker线程（钩子只入队，不直接执行重活）
+        _start_action_worker()
+
         # Set up global hook with suppression capability
         keyboard.hook(global_key_handler, suppress=True)
         logger.info("🥷 HIGH PRIORITY global key hook set up - OVERRIDES system shortcuts!")
@@ -1964,7 +2639,7 @@ def setup_keybindings():
             def on_ctrl_enter():
                 logger.info("🤖 Fallback: Ctrl + Enter pressed (AI Analysis)")
                 text_queue.put("Processing...")
-                asyncio.run_coroutine_threadsafe(process_openai(), loop)
+                loop.call_soon_threadsafe(loop.create_task, process_openai())
 
             def on_ctrl_g():
                 logger.info("🧹 Fallback: Ctrl + G pressed (Clear All)")
@@ -2056,23 +2731,23 @@ def setup_keybindings():
             keyboard.add_hotkey('ctrl+left', on_ctrl_left)
             keyboard.add_hotkey('ctrl+right', on_ctrl_right)
             keyboard.add_hotkey('ctrl+/', on_ctrl_question)  # Ctrl + ? for help
-            # Try multiple key variations for Page Up/Down
-            try:
-                keyboard.add_hotkey('ctrl+page up', on_ctrl_page_up)
-            except:
-                try:
-                    keyboard.add_hotkey('ctrl+page_up', on_ctrl_page_up)
-                except:
-                    keyboard.add_hotkey('ctrl+pgup', on_ctrl_page_up)
-            
-            try:
-                keyboard.add_hotkey('ctrl+page down', on_ctrl_page_down)
-            except:
-                try:
-                    keyboard.add_hotkey('ctrl+page_down', on_ctrl_page_down)
-                except:
-                    keyboard.add_hotkey('ctrl+pgdn', on_ctrl_page_down)
-            
+
+            # 🚀 每个按键只探测一次可用的键名变体并注册一个钩子，
+            # 不再用嵌套try/except（失败路径可能留下孤儿钩子，拖慢全系统按键）
+            def register_first_variant(variants, callback):
+                for name in variants:
+                    try:
+                        keyboard.add_hotkey(f'ctrl+{name}', callback)
+                        return name
+                    except Exception:
+                        continue
+                logger.warning(f"⚠️ 无法注册快捷键变体: {variants}")
+                return None
+
+            register_first_variant(('page up', 'page_up', 'pgup'), on_ctrl_page_up)
+            register_first_variant(('page down', 'page_down', 'pgdn'), on_ctrl_page_down)
+
+
             # Add alternative shortcuts for opacity control
             keyboard.add_hotkey('ctrl+=', on_ctrl_plus)
             keyboard.add_hotkey('ctrl+-', on_ctrl_minus)
@@ -2087,7 +2762,7 @@ def run_asyncio_loop(loop):
 
 def main():
     """Main function to start HUD with improved modular architecture."""
-    global loop, running, scroll_offset, use_speech
+    global loop, running, scroll_offset, use_speech, code_view_dirty, notification_text, notification_alpha
     
     try:
         # 设置控制台编码为UTF-8
@@ -2118,6 +2793,8 @@ def main():
 
         # Create HUD window
         create_hud()
+        # 初始化后断言一次置顶，之后只在窗口焦点/可见性事件时重设
+        keep_on_top()
 
         # Initialize asyncio loop for OpenAI
         loop = asyncio.new_event_loop()
@@ -2134,7 +2811,26 @@ def main():
         running = True
         
         logger.info("🎮 进入主游戏循环...")
-        
+
+        # 🚀 上一帧的可见状态，用于空闲帧检测（没变化就不重绘、不flip）
+        # text_rect/size用于HUD脏矩形：只清除并提交新旧文字区域的并集；
+        # mode记录上一帧渲染的是哪种视图——预览/代码窗口关闭本身不改变
+        # HUD状态，不跟踪模式的话切换后首帧会被空闲检测跳过，残留旧画面
+        _frame_state = {'lines': None, 'scroll': None, 'help_shown': None,
+                        'text_rect': None, 'size': None, 'mode': None}
+        # 🚀 代码窗口的上一帧渲染key：内容/滚动/尺寸都没变就整帧跳过
+        _code_frame_key = None
+        # 🚀 预览窗口的上一帧渲染key（截图+倒计时0.1s刻度）
+        _preview_frame_key = None
+        # 🚀 连续错误计数：持久性故障（显示设备坏掉等）时指数退避，
+        # 不固定以10Hz空转+刷日志
+        loop_error_count = 0
+
+        # 🚀 配置在运行期不变，提前取成局部变量，省去每帧的dict查找
+        wrap_width = window_settings['width'] - 20
+        max_lines = ui_settings['max_visible_lines']
+
+
         while running:
             try:
                 # Handle pygame events (幽灵窗口模式 - 只处理系统事件和键盘)
@@ -2142,7 +2838,18 @@ def main():
                     if event.type == pygame.QUIT:
                         running = False
                         logger.info("❌ 检测到窗口关闭事件")
+                    elif event.type in (pygame.WINDOWFOCUSLOST, pygame.WINDOWFOCUSGAINED, pygame.WINDOWSHOWN):
+                        # 🚀 置顶属性只在焦点/可见性变化时才可能丢失，不需要每帧重设
+                        keep_on_top()
+                    elif event.type == NOTIFY_EXPIRE_EVT:
+                        # 🚀 通知到期（SDL定时器投递），清空即可
+                        notification_text = ""
+                        notification_alpha = 0
+                    elif event.type == PREVIEW_EXPIRE_EVT:
+                        if screenshot_preview_visible:
+                            close_screenshot_preview()
                     # 🆕 移除所有鼠标事件处理 - 窗口现在是鼠标穿透的
+                    # （窗口移动统一走move_window里的Win32 SetWindowPos，绝不用set_mode重建surface）
                     elif event.type == pygame.KEYDOWN:
                         # ⚠️ 限制性键盘事件处理 - 只处理特定键，保证全局快捷键正常工作
                         handled = False
@@ -2166,7 +2873,7 @@ def main():
                             elif event.key == pygame.K_DOWN:
                                 # 向下滚动
                                 if current_highlighted_code:
-                                    adaptive_params = calculate_adaptive_code_display()
+                                    adaptive_params = get_adaptive_params()
                                     visible_lines = adaptive_params['visible_lines']
                                     max_scroll = max(0, len(current_highlighted_code) - visible_lines)
                                     code_scroll_offset = min(max_scroll, code_scroll_offset + 1)
@@ -2174,14 +2881,14 @@ def main():
                             elif event.key == pygame.K_PAGEUP:
                                 # 向上翻页
                                 if current_highlighted_code:
-                                    adaptive_params = calculate_adaptive_code_display()
+                                    adaptive_params = get_adaptive_params()
                                     visible_lines = adaptive_params['visible_lines']
                                     code_scroll_offset = max(0, code_scroll_offset - visible_lines)
                                 handled = True
                             elif event.key == pygame.K_PAGEDOWN:
                                 # 向下翻页
                                 if current_highlighted_code:
-                                    adaptive_params = calculate_adaptive_code_display()
+                                    adaptive_params = get_adaptive_params()
                                     visible_lines = adaptive_params['visible_lines']
                                     max_scroll = max(0, len(current_highlighted_code) - visible_lines)
                                     code_scroll_offset = min(max_scroll, code_scroll_offset + visible_lines)
@@ -2193,7 +2900,7 @@ def main():
                             elif event.key == pygame.K_END:
                                 # 跳到结尾
                                 if current_highlighted_code:
-                                    adaptive_params = calculate_adaptive_code_display()
+                                    adaptive_params = get_adaptive_params()
                                     visible_lines = adaptive_params['visible_lines']
                                     code_scroll_offset = max(0, len(current_highlighted_code) - visible_lines)
                                 handled = True
@@ -2207,51 +2914,124 @@ def main():
 
                 # Update overlay text
                 update_overlay()
-                keep_on_top()
+                # 🚀 合并本帧内累积的窗口移动（按键重复连发时只做一次SetWindowPos）
+                apply_pending_move()
                 
                 # Render based on current mode
+                frame_dirty = True
+                hud_dirty_rect = None  # HUD模式下非None时用update(rect)代替整屏flip
+                # 🚀 模式切换帧强制整屏重绘：跳帧key都只描述各自视图内部的状态，
+                # 识别不了"上一帧画的是另一种视图"
+                if screenshot_preview_visible:
+                    render_mode = 'preview'
+                elif code_window_visible:
+                    render_mode = 'code'
+                else:
+                    render_mode = 'hud'
+                mode_changed = render_mode != _frame_state['mode']
+                _frame_state['mode'] = render_mode
+
                 if screenshot_preview_visible:
                     # 截图预览模式 (最高优先级)
-                    render_screenshot_preview()
+                    # 🚀 预览是静态图+0.1s精度倒计时，只在倒计时数字变化时重绘（~10Hz）
+                    preview_key = (id(current_screenshot),
+                                   int(max(0, screenshot_preview_timer - time.time()) * 10))
+                    if not mode_changed and preview_key == _preview_frame_key:
+                        frame_dirty = False
+                    else:
+                        render_screenshot_preview()
+                        _preview_frame_key = preview_key
                 elif code_window_visible:
-                    # 代码查看模式
-                    render_pygame_code_window()
+                    # 代码查看模式（滚轮事件只标记脏位，这里统一消费）
+                    # 🚀 空闲帧检测：内容、滚动位置、窗口尺寸都没变时整帧跳过
+                    render_key = (id(current_code), code_scroll_offset, screen.get_size())
+                    if (not mode_changed and render_key == _code_frame_key
+                            and not code_view_dirty):
+                        frame_dirty = False
+                    else:
+                        render_pygame_code_window()
+                        code_view_dirty = False
+                        _code_frame_key = render_key
                 else:
                     # 正常HUD模式
-                    # Render HUD with wrapped text and scroll
-                    screen.fill((0, 0, 0))  # Black background (transparency controlled by Windows API)
-                    wrapped_lines = wrap_text(overlay_text, window_settings['width'] - 20, font)
-                    max_lines = ui_settings['max_visible_lines']
-                    visible_lines = wrapped_lines[scroll_offset:scroll_offset + max_lines]
-                    
-                    for i, line in enumerate(visible_lines):
-                        try:
-                            # 确保文本渲染支持中文字符
-                            text_surface = font.render(line, True, (255, 255, 255))
-                            screen.blit(text_surface, (10, 10 + i * 22))
-                        except Exception as e:
-                            # 如果渲染失败，尝试使用ASCII兼容的方式
-                            logger.debug(f"文本渲染错误: {e}")
-                            try:
-                                # 尝试编码转换
-                                safe_line = line.encode('utf-8', errors='replace').decode('utf-8')
-                                text_surface = font.render(safe_line, True, (255, 255, 255))
-                                screen.blit(text_surface, (10, 10 + i * 22))
-                            except:
-                                # 最后的备用方案
-                                text_surface = font.render("文本显示错误", True, (255, 100, 100))
-                                screen.blit(text_surface, (10, 10 + i * 22))
-
-                    # Draw help menu overlay if enabled (only in normal mode)
-                    draw_help_menu()
+                    wrapped_lines = wrap_text_cached(overlay_text, wrap_width, font)
+
+                    # 🚀 空闲帧检测：文本、滚动位置、帮助菜单都没变时跳过整个重绘+flip，
+                    # 避免每帧把整个窗口framebuffer推给合成器
+                    help_fading = ((show_help_menu and help_menu_alpha < 255) or
+                                   (not show_help_menu and help_menu_alpha > 0))
+                    if (not mode_changed and
+                            wrapped_lines is _frame_state['lines'] and
+                            scroll_offset == _frame_state['scroll'] and
+                            not help_fading and
+                            show_help_menu == _frame_state['help_shown']):
+                        frame_dirty = False
+                    else:
+                        # Render HUD with wrapped text and scroll
+                        visible_lines = wrapped_lines[scroll_offset:scroll_offset + max_lines]
+
+                        # 🚀 每行surface走缓存，整屏一次批量提交；
+                        # pygame-ce下fblits比blits再省一层每项的参数解析开销
+                        line_blits = [(render_overlay_line(line), (10, 10 + i * 22))
+                                      for i, line in enumerate(visible_lines)]
+
+                        # 🚀 HUD脏矩形：背景恒为黑，只有文字区域在变。清除并提交
+                        # 新旧文字矩形的并集即可，帮助菜单/尺寸变化时退回整屏路径
+                        text_rect = pygame.Rect(
+                            10, 10,
+                            max((s.get_width() for s, _ in line_blits), default=0),
+                            len(line_blits) * 22)
+                        screen_size = screen.get_size()
+                        prev_rect = _frame_state['text_rect']
+                        # 模式切换帧禁用脏矩形：旧画面是另一种视图，必须整屏清除
+                        use_dirty = (not mode_changed and
+                                     prev_rect is not None and
+                                     screen_size == _frame_state['size'] and
+                                     not show_help_menu and help_menu_alpha == 0)
+                        if use_dirty:
+                            hud_dirty_rect = text_rect.union(prev_rect).clip(
+                                screen.get_rect())
+                            screen.fill((0, 0, 0), hud_dirty_rect)
+                        else:
+                            screen.fill((0, 0, 0))  # Black background (transparency controlled by Windows API)
+
+                        if line_blits:
+                            if _HAS_FBLITS:
+                                screen.fblits(line_blits)
+                            else:
+                                screen.blits(line_blits, doreturn=False)
+
+                        # Draw help menu overlay if enabled (only in normal mode)
+                        draw_help_menu()
+
+                        _frame_state['lines'] = wrapped_lines
+                        _frame_state['scroll'] = scroll_offset
+                        _frame_state['help_shown'] = show_help_menu
+                        _frame_state['text_rect'] = text_rect
+                        _frame_state['size'] = screen_size
+
+                if frame_dirty:
+                    # 🚀 小范围变化走update(rect)：SDL只上传并集区域，不推整个framebuffer
+                    if hud_dirty_rect is not None:
+                        pygame.display.update(hud_dirty_rect)
+                    else:
+                        pygame.display.flip()
+                # 🚀 自适应帧率：有内容变化时60 FPS保证动画流畅，空闲时降到15 FPS省CPU。
+                # 不用event.wait阻塞到事件：text_queue由后台线程喂数据、不投递pygame
+                # 事件，阻塞会把流式AI文本的上屏延迟拉到超时上限，15Hz轮询是折中。
+                # （event.wait(66)的唤醒次数和tick(15)一样，除非把超时拉长——
+                # 那又回到文本延迟问题；真要事件驱动需要所有生产者post唤醒事件）
+                clock.tick(60 if frame_dirty else 15)
+                loop_error_count = 0  # 本帧成功，重置退避
 
-                pygame.display.flip()
-                clock.tick(60)  # 60 FPS for smooth animations
-                
             except Exception as e:
-                logger.error(f"Pygame loop error: {e}")
+                # %s延迟格式化：级别被过滤时logger.error在isEnabledFor就返回，
+                # 不会构建字符串；无需再缓存一个"错误级别是否启用"的模块标志
+                logger.error("Pygame loop error: %s", e)
                 # Continue running instead of crashing
-                time.sleep(0.1)
+                # 🚀 指数退避：一次性错误仍是100ms恢复，连续失败逐步拉长到5秒上限
+                loop_error_count += 1
+                time.sleep(min(0.1 * (1 << min(loop_error_count - 1, 6)), 5.0))
 
     except KeyboardInterrupt:
         logger.info("⚠️ Keyboard interrupt received")
@@ -2262,7 +3042,9 @@ def main():
         raise
     finally:
         # Cleanup resources
-        logger.info("🧹 正在清理资源...")
+        # 🚀 各步骤只收集摘要，最后一条日志统一输出：关机路径上不为
+        # 每个步骤单独跑一遍formatter+写流
+        cleanup_steps = []
         
         # Clean up screenshots first
         cleanup_screenshots()
@@ -2282,23 +3064,35 @@ def main():
         # Clean up pygame
         if 'pygame' in globals():
             pygame.quit()
-            logger.info("🎮 Pygame资源已清理")
+            cleanup_steps.append("🎮 Pygame资源已清理")
         
         # Clean up keyboard hooks
+        # 裸except会连KeyboardInterrupt/SystemExit一起吞掉，拖慢关机；
+        # 只捕获unhook可能抛的具体异常
         try:
             keyboard.unhook_all()
-            logger.info("⌨️ 键盘绑定已移除")
-        except:
-            pass
+        except (RuntimeError, AttributeError, KeyError) as e:
+            logger.debug("unhook_all失败: %s", e)
+        else:
+            cleanup_steps.append("⌨️ 键盘绑定已移除")
         
         # Save final config state
+        # 🚀 唯一的配置落盘点：运行期间config.set只改内存，窗口位置等
+        # 高频更新在这里一次性写出，按键路径上没有任何磁盘I/O
         try:
             config.save_config()
-            logger.info("💾 配置已保存")
-        except Exception as e:
-            logger.error(f"保存配置失败: {e}")
+        except OSError as e:
+            logger.error("保存配置失败: %s", e)
+        else:
+            cleanup_steps.append("💾 配置已保存")
         
-        logger.info("✅ GhostMentor 已完全关闭")
+        logger.info("✅ GhostMentor 已完全关闭 (%s)", "，".join(cleanup_steps))
+
+        # 最后停掉文件日志listener线程并冲刷队列（此后再log就只剩控制台）
+        try:
+            log_manager.shutdown()
+        except Exception:
+            pass
 
 if __name__ == "__main__":
     try:
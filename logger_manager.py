@@ -5,13 +5,47 @@ GhostMentor Logger Manager
 """
 
 import logging
+import logging.handlers
 import os
+import queue
 import sys
+from pathlib import Path
 from datetime import datetime
 from typing import Optional
 from config_manager import config
 
-class ColoredFormatter(logging.Formatter):
+# 日志目录（目录创建留在setup_file_logging：禁用文件日志时不留空目录）
+_LOG_DIR = Path('logs')
+
+class CachedTimeFormatter(logging.Formatter):
+    """按整数秒缓存asctime的格式化器
+
+    🚀 localtime+strftime是短日志行里最贵的一步；这里的datefmt都是
+    秒级精度，同一秒内的记录直接复用上次格式化结果。
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._time_cache = (None, None)  # (整数秒, 格式化串)
+
+    def formatTime(self, record, datefmt=None):
+        sec = int(record.created)
+        cached_sec, cached_str = self._time_cache
+        if sec != cached_sec:
+            cached_str = super().formatTime(record, datefmt)
+            self._time_cache = (sec, cached_str)
+        return cached_str
+
+    def format(self, record):
+        formatted = super().format(record)
+        # DedupFilter在放行补发记录时挂上的抑制说明：在格式化输出末尾
+        # 追加而不是改写record.msg，保持记录本身干净（见DedupFilter）
+        note = getattr(record, 'dedup_note', None)
+        if note:
+            formatted += note
+        return formatted
+
+class ColoredFormatter(CachedTimeFormatter):
     """彩色日志格式化器"""
     
     COLORS = {
@@ -22,32 +56,100 @@ class ColoredFormatter(logging.Formatter):
         'CRITICAL': '\033[35m',   # 紫色
         'RESET': '\033[0m'        # 重置
     }
-    
-    def format(self, record):
-        # 添加颜色
-        if record.levelname in self.COLORS:
-            record.levelname = f"{self.COLORS[record.levelname]}{record.levelname}{self.COLORS['RESET']}"
-        
-        # 添加emoji图标
-        emoji_map = {
-            'DEBUG': '🔧',
-            'INFO': '📝', 
-            'WARNING': '⚠️',
-            'ERROR': '❌',
-            'CRITICAL': '💀'
+
+    _EMOJIS = {
+        'DEBUG': '🔧',
+        'INFO': '📝', 
+        'WARNING': '⚠️',
+        'ERROR': '❌',
+        'CRITICAL': '💀'
+    }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 🚀 预拼好"着色级别名+emoji"查表：每条记录一次levelno查找，
+        # 不再每条都做f-string拼接，更不用靠5连replace把颜色码再剥回来。
+        # （emoji表也随之出了format热路径——原实现每条记录都重建一个dict字面量）
+        self._decor = {
+            getattr(logging, name): (f"{color}{name}{self.COLORS['RESET']}",
+                                     self._EMOJIS[name])
+            for name, color in self.COLORS.items() if name != 'RESET'
         }
-        
-        level_name = record.levelname.replace(self.COLORS['RESET'], '').replace('\033[32m', '').replace('\033[33m', '').replace('\033[31m', '').replace('\033[35m', '').replace('\033[36m', '')
-        emoji = emoji_map.get(level_name, '📝')
-        record.emoji = emoji
+
+    def format(self, record):
+        # 留在%风格：PercentStyle只在构造时解析格式串，每条记录是一次
+        # C层的%运算，换{}-style并不会更快。
+        # 着色结果放独立属性而不是改写record.levelname：同一条record还会
+        # 流经文件日志的QueueHandler，原地改写会把ANSI码带进日志文件
+        decor = self._decor.get(record.levelno)
+        if decor is not None:
+            record.colored_levelname, record.emoji = decor
+        else:
+            record.colored_levelname = record.levelname  # 自定义级别没有配色
+            record.emoji = '📝'
         
         return super().format(record)
 
+class DedupFilter(logging.Filter):
+    """重复日志抑制过滤器
+
+    🚀 同一条消息在5秒窗口内只放行第一条（主循环的except每0.1秒就会
+    打一条同样的错误，持久性故障下会刷爆日志）。窗口过后下一条放行时
+    通过record.dedup_note补上被抑制的次数，不丢信息。去重key是参数代入
+    后的完整消息：大量热路径日志用惰性%s风格，按模板去重会把参数不同的
+    正常消息（通知、截图切换提示）当成重复吞掉。
+
+    同一条record会依次流经控制台和文件两个handler：全局只用一个过滤器
+    实例，把裁决缓存在record上，第二个handler直接复用——既不重复计数，
+    也不改写record.msg（改写会把抑制说明当成新的去重key带进另一侧）。
+    """
+
+    WINDOW = 5.0
+    _MAX_TRACKED = 256
+
+    def __init__(self):
+        super().__init__()
+        self._seen = {}  # 完整消息 -> [上次放行时间, 窗口内被抑制次数]
+
+    def filter(self, record):
+        cached = getattr(record, 'dedup_allow', None)
+        if cached is not None:
+            return cached  # 另一个handler已经裁决过这条record
+
+        key = record.getMessage()
+        entry = self._seen.get(key)
+        if entry is not None and record.created - entry[0] < self.WINDOW:
+            entry[1] += 1
+            record.dedup_allow = False
+            return False
+
+        suppressed = entry[1] if entry is not None else 0
+        if len(self._seen) >= self._MAX_TRACKED:
+            self._seen.clear()  # 简单防膨胀，消息模板种类极少会到这个量
+        self._seen[key] = [record.created, 0]
+        if suppressed:
+            # 抑制说明走独立属性，由CachedTimeFormatter在输出末尾追加
+            record.dedup_note = f" (5秒内重复{suppressed}次被抑制)"
+        record.dedup_allow = True
+        return True
+
+class BufferedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """打开底层流时使用128KiB大缓冲的滚动文件处理器"""
+
+    def _open(self):
+        # 🚀 默认~8KiB文本缓冲下小日志行频繁触发write syscall，
+        # 128KiB让OS收到按块对齐的批量写
+        return open(self.baseFilename, self.mode,
+                    buffering=131072, encoding=self.encoding)
+
 class LoggerManager:
     """日志管理器"""
     
     def __init__(self):
-        self.loggers = {}
+        self.listener = None  # 文件日志的QueueListener后台线程
+        self._memory_handler = None  # 批量落盘的缓冲层，shutdown时关闭冲刷
+        self._file_handler = None  # 滚动文件处理器，shutdown时关闭
+        self._dedup_filter = None  # 控制台/文件共享的去重过滤器
         self.setup_logging()
     
     def setup_logging(self):
@@ -79,11 +181,24 @@ class LoggerManager:
         console_handler.setLevel(log_level)
         
         # 彩色格式化器
-        console_formatter = ColoredFormatter(
-            '%(emoji)s %(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            datefmt='%H:%M:%S'
-        )
+        # 🚀 stdout被重定向到管道/文件时不发ANSI颜色码（也遵循NO_COLOR约定）：
+        # 省掉每条记录的转义序列字节，下游工具也不用再剥色
+        use_color = (hasattr(sys.stdout, 'isatty') and sys.stdout.isatty()
+                     and os.environ.get('NO_COLOR') is None)
+        if use_color:
+            console_formatter = ColoredFormatter(
+                '%(emoji)s %(asctime)s - %(name)s - %(colored_levelname)s - %(message)s',
+                datefmt='%H:%M:%S'
+            )
+        else:
+            console_formatter = CachedTimeFormatter(
+                '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                datefmt='%H:%M:%S'
+            )
         console_handler.setFormatter(console_formatter)
+        # 🚀 控制台与文件handler共享同一个去重实例（见DedupFilter注释）
+        self._dedup_filter = DedupFilter()
+        console_handler.addFilter(self._dedup_filter)
         root_logger.addHandler(console_handler)
         
         # 文件处理器（如果启用）
@@ -95,30 +210,61 @@ class LoggerManager:
         self.setup_third_party_loggers()
     
     def setup_file_logging(self, logger: logging.Logger, log_file: str, level: int):
-        """设置文件日志"""
+        """设置文件日志
+
+        🚀 文件写入走QueueHandler/QueueListener：调用方的logger.info只做一次
+        内存入队，真正的磁盘write由单独的listener线程完成，热路径（pygame
+        主循环、键盘钩子）不再被文件I/O阻塞。
+        """
         try:
             # 创建logs目录
-            os.makedirs('logs', exist_ok=True)
-            log_path = os.path.join('logs', log_file)
+            _LOG_DIR.mkdir(exist_ok=True)
+            log_path = str(_LOG_DIR / log_file)
             
-            # 文件处理器
-            file_handler = logging.FileHandler(log_path, encoding='utf-8')
+            # 文件处理器（由listener线程持有，不直接挂到logger上）
+            # 🚀 10MB×5滚动：长时间运行不再无限增长；delay=True把open()
+            # 推迟到第一条记录真正落盘时，空日志会话连文件都不碰
+            file_handler = BufferedRotatingFileHandler(
+                log_path, maxBytes=10 * 1024 * 1024, backupCount=5,
+                encoding='utf-8', delay=True)
             file_handler.setLevel(level)
+            self._file_handler = file_handler
             
-            # 文件格式化器（无颜色）
-            file_formatter = logging.Formatter(
+            # 文件格式化器（无颜色，asctime同样走秒级缓存）
+            file_formatter = CachedTimeFormatter(
                 '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
                 datefmt='%Y-%m-%d %H:%M:%S'
             )
             file_handler.setFormatter(file_formatter)
-            logger.addHandler(file_handler)
+
+            # 🚀 listener线程侧再包一层MemoryHandler：INFO/DEBUG攒满512条才
+            # 写一次文件，把每条记录一次write syscall摊薄成批量写；
+            # ERROR及以上立即冲刷，不会在崩溃前困在缓冲里
+            self._memory_handler = logging.handlers.MemoryHandler(
+                capacity=512, flushLevel=logging.ERROR,
+                target=file_handler, flushOnClose=True)
+
+            log_queue = queue.Queue(-1)
+            queue_handler = logging.handlers.QueueHandler(log_queue)
+            # 复用控制台那只去重过滤器：裁决已缓存在record上，这里拿到的
+            # 是同一份窗口和计数
+            queue_handler.addFilter(self._dedup_filter)
+            logger.addHandler(queue_handler)
+            self.listener = logging.handlers.QueueListener(
+                log_queue, self._memory_handler, respect_handler_level=True)
+            self.listener.start()
             
             logger.info(f"📁 File logging enabled: {log_path}")
         except Exception as e:
             logger.error(f"Failed to setup file logging: {e}")
     
     def setup_third_party_loggers(self):
-        """设置第三方库日志级别"""
+        """设置第三方库日志级别
+
+        用setLevel而不是root上挂过滤器：级别在库自己的logger.isEnabledFor
+        就拦住了，LogRecord根本不会创建；过滤器要等record构建完才能丢弃。
+        子模块（如PIL.PngImagePlugin）自动继承父logger的级别。
+        """
         # 降低第三方库的日志级别以减少噪音
         third_party_loggers = [
             'pygame',
@@ -126,34 +272,72 @@ class LoggerManager:
             'openai',
             'faster_whisper',
             'pyaudio',
-            'keyboard'
+            'keyboard',
+            # openai的HTTP传输层，INFO下每个请求都会打日志
+            'urllib3',
+            'httpx',
+            'httpcore',
         ]
         
         for logger_name in third_party_loggers:
             logging.getLogger(logger_name).setLevel(logging.WARNING)
     
+    def shutdown(self):
+        """停止文件日志listener线程，把队列中未落盘的记录冲刷出去"""
+        if self.listener is not None:
+            try:
+                self.listener.stop()
+            except Exception:
+                pass
+            self.listener = None
+        if self._memory_handler is not None:
+            try:
+                self._memory_handler.close()  # flushOnClose=True，缓冲残留一并写盘
+            except Exception:
+                pass
+            self._memory_handler = None
+        if self._file_handler is not None:
+            try:
+                self._file_handler.close()  # close隐含flush，把流缓冲写盘
+            except Exception:
+                pass
+            self._file_handler = None
+
     def get_logger(self, name: str) -> logging.Logger:
-        """获取命名logger"""
-        if name not in self.loggers:
-            self.loggers[name] = logging.getLogger(name)
-        return self.loggers[name]
+        """获取命名logger
+
+        logging.getLogger本身就是线程安全且带缓存的（C级dict查找），
+        再包一层Python侧的dict只是多付一次分支和属性查找。
+        """
+        return logging.getLogger(name)
     
     def log_system_info(self):
-        """记录系统信息"""
+        """记录系统信息（幂等：只在首次调用时输出）"""
+        # 🚀 once保护：重载或多个子系统重复调用时不再重新取配置、重新格式化
+        if getattr(self, '_sysinfo_logged', False):
+            return
+        self._sysinfo_logged = True
+
         logger = self.get_logger('system')
+        # 🚀 级别被过滤时整段跳过：配置dict拷贝和round计算都不做，
+        # 各条消息用%s延迟格式化
+        if not logger.isEnabledFor(logging.INFO):
+            return
         logger.info("🍎 GhostMentor Ultra Stealth Edition")
-        logger.info(f"🐍 Python version: {sys.version}")
-        logger.info(f"💻 Platform: {sys.platform}")
-        logger.info(f"📅 Start time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        logger.info("🐍 Python version: %s", sys.version)
+        logger.info("💻 Platform: %s", sys.platform)
+        logger.info("📅 Start time: %s", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
         
-        # 记录配置信息
+        # 记录配置信息（窗口/音频各合并成一条记录）
         window_settings = config.get_window_settings()
-        logger.info(f"🪟 Window size: {window_settings['width']}x{window_settings['height']}")
-        logger.info(f"🎨 Window opacity: {window_settings['opacity']}/255 ({round(window_settings['opacity']/255*100)}%)")
+        logger.info("🪟 Window: %dx%d  🎨 opacity %d/255 (%d%%)",
+                    window_settings['width'], window_settings['height'],
+                    window_settings['opacity'],
+                    round(window_settings['opacity'] / 255 * 100))
         
         audio_settings = config.get_audio_settings()
-        logger.info(f"🎤 Audio sampling rate: {audio_settings['sampling_rate']} Hz")
-        logger.info(f"🧠 Whisper model: {audio_settings['whisper_model']}")
+        logger.info("🎤 Audio: %s Hz  🧠 Whisper model: %s",
+                    audio_settings['sampling_rate'], audio_settings['whisper_model'])
 
 # 全局日志管理器实例
 log_manager = LoggerManager()